@@ -0,0 +1,92 @@
+"""Timing helpers shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    statements: float | None = None
+
+
+def _result(
+    name: str, samples: list[int], statements: float | None = None
+) -> BenchResult:
+    samples.sort()
+    total = sum(samples)
+    return BenchResult(
+        name=name,
+        iterations=len(samples),
+        ops_per_sec=len(samples) / (total / 1e9) if total else float("inf"),
+        p50_us=samples[len(samples) // 2] / 1e3,
+        p99_us=samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e3,
+        statements=statements,
+    )
+
+
+def bench(
+    name: str,
+    func: Callable[[], object],
+    *,
+    iterations: int = 10_000,
+    warmup: int = 200,
+) -> BenchResult:
+    """Time `func` call by call and summarise throughput and latency."""
+    for _ in range(warmup):
+        func()
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(iterations):
+        start = clock()
+        func()
+        samples.append(clock() - start)
+    return _result(name, samples)
+
+
+def bench_async(
+    name: str,
+    func: Callable[[], Awaitable[object]],
+    *,
+    iterations: int = 10_000,
+    warmup: int = 200,
+    statements: Callable[[], int] | None = None,
+) -> BenchResult:
+    """Async variant of `bench`; `statements` reports a running statement count."""
+
+    async def run() -> BenchResult:
+        for _ in range(warmup):
+            await func()
+        before = statements() if statements else 0
+        clock = time.perf_counter_ns
+        samples = []
+        for _ in range(iterations):
+            start = clock()
+            await func()
+            samples.append(clock() - start)
+        per_op = (statements() - before) / iterations if statements else None
+        return _result(name, samples, per_op)
+
+    return asyncio.run(run())
+
+
+def report(results: list[BenchResult]) -> None:
+    width = max(len(r.name) for r in results)
+    print(
+        f"{'benchmark':<{width}}  {'ops/sec':>12}  {'p50 us':>9}  {'p99 us':>9}"
+        f"  {'stmts/op':>8}"
+    )
+    for r in results:
+        stmts = f"{r.statements:8.1f}" if r.statements is not None else f"{'-':>8}"
+        print(
+            f"{r.name:<{width}}  {r.ops_per_sec:12,.0f}  {r.p50_us:9.2f}"
+            f"  {r.p99_us:9.2f}  {stmts}"
+        )
@@ -0,0 +1,175 @@
+"""Benchmarks for token parsing and the FastAPI/websocket auth entry points."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from uuid import UUID
+
+from _harness import BenchResult, bench, bench_async, report
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocket
+
+from tenauth import schemas
+from tenauth.batch import validate_tokens
+from tenauth.cache import TokenCache
+from tenauth.fastapi import get_access_context
+from tenauth.schemas import AccessContext, AuthContext
+from tenauth.utils import TokenMinter, create_bearer_token
+from tenauth.websocket import websocket_access_context
+
+CONTEXT = AuthContext(
+    sub=UUID("0c67622b-fcc5-4b58-9998-421b73e48df9"),
+    tid=UUID("00000000-0000-0000-0000-000000000000"),
+    role="admin",
+    scopes=["datasets:read", "datasets:write", "members:read"],
+    plan="dev",
+    iat=1758781060,
+    exp=4102444800,
+    iss="vecapi",
+    aud="vecapi-clients",
+)
+BEARER = create_bearer_token(CONTEXT)
+TOKEN = BEARER.split(" ", 1)[1]
+BATCH = [
+    create_bearer_token(CONTEXT.model_copy(update={"role": f"role-{i % 10}"}))
+    for i in range(100)
+]
+
+
+def _websocket(
+    headers: dict[str, str] | None = None, query: str = ""
+) -> Callable[[], WebSocket]:
+    scope = {
+        "type": "websocket",
+        "path": "/ws",
+        "query_string": query.encode(),
+        "headers": [
+            (k.lower().encode(), v.encode()) for k, v in (headers or {}).items()
+        ],
+    }
+
+    async def receive():  # pragma: no cover - never awaited
+        raise RuntimeError
+
+    async def send(_message):  # pragma: no cover - never awaited
+        raise RuntimeError
+
+    return lambda: WebSocket(scope, receive, send)
+
+
+def _bench_fast_stdlib_json(iterations: int) -> BenchResult:
+    json_backend = schemas._json_loads
+    schemas._json_loads = schemas.json.loads
+    try:
+        return bench(
+            "from_token fast (stdlib json)",
+            lambda: AuthContext.from_token(TOKEN, fast=True),
+            iterations=iterations,
+        )
+    finally:
+        schemas._json_loads = json_backend
+
+
+def bench_tokens(iterations: int) -> list[BenchResult]:
+    assert AuthContext.from_token(TOKEN, fast=True) == AuthContext.from_token(TOKEN)
+    cache = TokenCache()
+    minter = TokenMinter(b"bench-secret")
+    uncached = TokenMinter(b"bench-secret", cache_size=1)
+    contexts = [CONTEXT.model_copy(update={"role": f"role-{i}"}) for i in range(2)]
+    backend = "orjson" if schemas.orjson is not None else "stdlib json"
+    return [
+        bench(
+            "from_token", lambda: AuthContext.from_token(TOKEN), iterations=iterations
+        ),
+        _bench_fast_stdlib_json(iterations),
+        bench(
+            f"from_token fast ({backend})",
+            lambda: AuthContext.from_token(TOKEN, fast=True),
+            iterations=iterations,
+        ),
+        bench(
+            "from_token cached",
+            lambda: AuthContext.from_token(TOKEN, cache=cache),
+            iterations=iterations,
+        ),
+        bench(
+            "validate_tokens x100",
+            lambda: validate_tokens(BATCH),
+            iterations=max(iterations // 100, 10),
+        ),
+        bench(
+            "create_bearer_token",
+            lambda: create_bearer_token(CONTEXT),
+            iterations=iterations,
+        ),
+        bench(
+            "TokenMinter.mint_many x2 HS256",
+            lambda: uncached.mint_many(contexts),
+            iterations=iterations,
+        ),
+        bench(
+            "TokenMinter.mint cached",
+            lambda: minter.mint(CONTEXT),
+            iterations=iterations,
+        ),
+    ]
+
+
+def bench_dependency_chain(iterations: int) -> list[BenchResult]:
+    app = FastAPI()
+
+    @app.get("/access")
+    def access(ctx: AccessContext = Depends(get_access_context)):
+        return None
+
+    @app.get("/baseline")
+    def baseline():
+        return None
+
+    client = TestClient(app)
+    headers = {"Authorization": BEARER}
+    return [
+        bench(
+            "http baseline (no auth)",
+            lambda: client.get("/baseline", headers=headers),
+            iterations=iterations,
+        ),
+        bench(
+            "http get_access_context",
+            lambda: client.get("/access", headers=headers),
+            iterations=iterations,
+        ),
+    ]
+
+
+def bench_websocket(iterations: int) -> list[BenchResult]:
+    sources = {
+        "ws authorization header": _websocket({"Authorization": BEARER}),
+        "ws access_token query": _websocket(query=f"access_token={TOKEN}"),
+        "ws subprotocol": _websocket(
+            {"Sec-WebSocket-Protocol": f"chat, access_token={TOKEN}"}
+        ),
+    }
+    return [
+        bench_async(
+            name,
+            lambda make=make: websocket_access_context(make()),
+            iterations=iterations,
+        )
+        for name, make in sources.items()
+    ]
+
+
+def main(iterations: int = 10_000) -> list[BenchResult]:
+    results = [
+        *bench_tokens(iterations),
+        *bench_dependency_chain(max(iterations // 10, 100)),
+        *bench_websocket(iterations),
+    ]
+    report(results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmarks for the cost of importing tenauth in a fresh interpreter."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+from _harness import BenchResult, _result, report
+
+# each snippet runs in its own interpreter and prints its import time and peak RSS
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter_ns()
+{code}
+elapsed = time.perf_counter_ns() - start
+heavy = [m for m in ("fastapi", "starlette", "sqlalchemy", "sqlmodel")
+         if m in sys.modules]
+print(json.dumps([elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, heavy]))
+"""
+
+SCENARIOS = [
+    ("import tenauth", "import tenauth"),
+    ("tenauth.AuthContext", "import tenauth; tenauth.AuthContext"),
+    ("tenauth.dsn_with_tenant", "import tenauth; tenauth.dsn_with_tenant"),
+    ("tenauth.get_auth_context", "import tenauth; tenauth.get_auth_context"),
+    (
+        "all submodules",
+        "import tenauth.fastapi, tenauth.session, tenauth.websocket, tenauth.tenancy",
+    ),
+]
+
+
+def _probe(code: str) -> tuple[int, int, list[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(code=code)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    elapsed, rss, heavy = json.loads(output)
+    return elapsed, rss, heavy
+
+
+def bench_import(iterations: int = 20) -> list[BenchResult]:
+    results = []
+    for name, code in SCENARIOS:
+        samples = []
+        rss = 0
+        heavy: list[str] = []
+        for _ in range(iterations):
+            elapsed, rss, heavy = _probe(code)
+            samples.append(elapsed)
+        label = f"{name} [{rss // 1024} MiB{', loads web/db stack' if heavy else ''}]"
+        results.append(_result(label, samples))
+    return results
+
+
+def main(iterations: int = 20) -> list[BenchResult]:
+    results = bench_import(iterations)
+    report(results)
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,62 @@
+"""Benchmarks for DSN rewriting and access-context session binding."""
+
+from __future__ import annotations
+
+from uuid import UUID
+
+from _harness import BenchResult, bench, bench_async, report
+
+from tenauth.schemas import AccessContext
+from tenauth.session import apply_access_context, reset_access_context
+from tenauth.tenancy import dsn_with_tenant
+from tenauth.testing import FakeSession
+
+TENANT = UUID("00000000-0000-0000-0000-000000000000")
+ACCESS = AccessContext(
+    tenant_id=TENANT, user_id=UUID("0c67622b-fcc5-4b58-9998-421b73e48df9")
+)
+DSN = "postgresql+asyncpg://svc@db.example.com/app?sslmode=require&options=-c%20search_path%3Dapp"
+
+
+def bench_dsn(iterations: int) -> list[BenchResult]:
+    return [
+        bench(
+            "dsn_with_tenant",
+            lambda: dsn_with_tenant(DSN, TENANT),
+            iterations=iterations,
+        )
+    ]
+
+
+def bench_binding(iterations: int) -> list[BenchResult]:
+    results = []
+    for name, kwargs in [
+        ("apply+reset", {}),
+        ("apply+reset verify=False", {"verify": False}),
+        ("apply+reset single_statement", {"single_statement": True}),
+    ]:
+        session = FakeSession()
+
+        async def cycle(kwargs=kwargs, session=session) -> None:
+            await apply_access_context(session, access_context=ACCESS, **kwargs)
+            await reset_access_context(session)
+
+        results.append(
+            bench_async(
+                name,
+                cycle,
+                iterations=iterations,
+                statements=lambda session=session: len(session.statements),
+            )
+        )
+    return results
+
+
+def main(iterations: int = 10_000) -> list[BenchResult]:
+    results = [*bench_dsn(iterations), *bench_binding(iterations)]
+    report(results)
+    return results
+
+
+if __name__ == "__main__":
+    main()
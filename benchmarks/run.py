@@ -0,0 +1,31 @@
+"""Run the benchmark suite for the auth and session hot paths.
+
+Usage: `uv run python benchmarks/run.py [iterations]`
+"""
+
+from __future__ import annotations
+
+import sys
+
+import bench_auth
+import bench_import
+import bench_session
+from _harness import report
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    report(
+        [
+            *bench_auth.bench_tokens(iterations),
+            *bench_auth.bench_dependency_chain(max(iterations // 10, 100)),
+            *bench_auth.bench_websocket(iterations),
+            *bench_session.bench_dsn(iterations),
+            *bench_session.bench_binding(iterations),
+            *bench_import.bench_import(max(iterations // 1000, 5)),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    main()
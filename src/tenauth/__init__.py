@@ -1,42 +1,193 @@
-from .fastapi import (
-    BEARER_SCHEME,
-    AUTHORIZATION_KEY,
-    build_access_scoped_session_dependency,
-    get_access_context,
-    get_auth_context,
-    get_bearer_token,
-    require_access_context,
-    require_auth,
-)
-from .schemas import AccessContext, AuthContext
-from .session import (
-    SessionFactory,
-    access_scoped_session_ctx,
-    apply_access_context,
-    reset_access_context,
-    verify_access_context,
-)
-from .tenancy import dsn_with_tenant
-from .utils import create_bearer_token
-from .websocket import websocket_access_context
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .admission import AdmissionRejected, TenantAdmissionController
+    from .authorization import ScopeRegistry
+    from .batch import TokenResult, validate_tokens
+    from .cache import TokenCache, TokenCacheStats
+    from .client import BearerAuth, TenantClients
+    from .context import bind_access_context, get_current_access_context
+    from .entitlements import EntitlementCache, Entitlements
+    from .fastapi import (
+        BEARER_SCHEME,
+        AUTHORIZATION_KEY,
+        build_access_scoped_session_dependency,
+        build_introspection_auth_dependency,
+        get_access_context,
+        get_auth_context,
+        get_bearer_token,
+        get_entitlements,
+        require_access_context,
+        require_auth,
+        require_feature,
+        require_role,
+        require_scopes,
+    )
+    from .introspection import IntrospectionClient
+    from .jobs import TenantJobReport, TenantJobResult, TenantJobRunner
+    from .jwks import KeyStore, TokenVerificationError
+    from .middleware import (
+        AuthContextMiddleware,
+        get_scope_access_context,
+        get_scope_auth_context,
+    )
+    from .revocation import RevocationIndex
+    from .schemas import AccessContext, AuthContext, CompactAccessContext
+    from .session import (
+        SessionFactory,
+        access_scoped_session_ctx,
+        apply_access_context,
+        gather_scoped,
+        reset_access_context,
+        track_connection_access_context,
+        transaction_local_access_context,
+        verify_access_context,
+    )
+    from .tenancy import TenantEngineRegistry, dsn_with_tenant
+    from .utils import TokenMinter, create_bearer_token
+    from .websocket import (
+        WebSocketRegistry,
+        WebSocketSessionManager,
+        resolve_websocket_auth_context,
+        websocket_access_context,
+        websocket_auth_context,
+        websocket_compact_access_context,
+    )
 
 __all__ = [
     "AccessContext",
+    "AdmissionRejected",
     "AuthContext",
+    "AuthContextMiddleware",
     "AUTHORIZATION_KEY",
     "BEARER_SCHEME",
+    "BearerAuth",
+    "CompactAccessContext",
+    "EntitlementCache",
+    "Entitlements",
+    "IntrospectionClient",
+    "KeyStore",
+    "RevocationIndex",
+    "ScopeRegistry",
     "SessionFactory",
+    "TenantAdmissionController",
+    "TenantClients",
+    "TenantEngineRegistry",
+    "TenantJobReport",
+    "TenantJobResult",
+    "TenantJobRunner",
+    "TokenCache",
+    "TokenCacheStats",
+    "TokenMinter",
+    "TokenResult",
+    "TokenVerificationError",
+    "WebSocketRegistry",
+    "WebSocketSessionManager",
     "create_bearer_token",
     "get_access_context",
     "get_auth_context",
     "get_bearer_token",
+    "get_entitlements",
+    "get_scope_access_context",
+    "get_scope_auth_context",
     "require_access_context",
     "require_auth",
+    "require_feature",
+    "require_role",
+    "require_scopes",
     "build_access_scoped_session_dependency",
+    "build_introspection_auth_dependency",
     "access_scoped_session_ctx",
     "apply_access_context",
+    "bind_access_context",
+    "gather_scoped",
+    "get_current_access_context",
     "reset_access_context",
+    "track_connection_access_context",
+    "transaction_local_access_context",
+    "validate_tokens",
     "verify_access_context",
     "dsn_with_tenant",
+    "resolve_websocket_auth_context",
     "websocket_access_context",
+    "websocket_auth_context",
+    "websocket_compact_access_context",
 ]
+
+# Public names are imported on first access, so `import tenauth` doesn't
+# load FastAPI or SQLAlchemy until something that needs them is used.
+_EXPORTS = {
+    "AccessContext": "schemas",
+    "AdmissionRejected": "admission",
+    "AuthContext": "schemas",
+    "AuthContextMiddleware": "middleware",
+    "AUTHORIZATION_KEY": "fastapi",
+    "BEARER_SCHEME": "fastapi",
+    "BearerAuth": "client",
+    "CompactAccessContext": "schemas",
+    "EntitlementCache": "entitlements",
+    "Entitlements": "entitlements",
+    "IntrospectionClient": "introspection",
+    "KeyStore": "jwks",
+    "RevocationIndex": "revocation",
+    "ScopeRegistry": "authorization",
+    "SessionFactory": "session",
+    "TenantAdmissionController": "admission",
+    "TenantClients": "client",
+    "TenantEngineRegistry": "tenancy",
+    "TenantJobReport": "jobs",
+    "TenantJobResult": "jobs",
+    "TenantJobRunner": "jobs",
+    "TokenCache": "cache",
+    "TokenCacheStats": "cache",
+    "TokenMinter": "utils",
+    "TokenResult": "batch",
+    "TokenVerificationError": "jwks",
+    "WebSocketRegistry": "websocket",
+    "WebSocketSessionManager": "websocket",
+    "create_bearer_token": "utils",
+    "get_access_context": "fastapi",
+    "get_auth_context": "fastapi",
+    "get_bearer_token": "fastapi",
+    "get_entitlements": "fastapi",
+    "get_scope_access_context": "middleware",
+    "get_scope_auth_context": "middleware",
+    "require_access_context": "fastapi",
+    "require_auth": "fastapi",
+    "require_feature": "fastapi",
+    "require_role": "fastapi",
+    "require_scopes": "fastapi",
+    "build_access_scoped_session_dependency": "fastapi",
+    "build_introspection_auth_dependency": "fastapi",
+    "access_scoped_session_ctx": "session",
+    "apply_access_context": "session",
+    "bind_access_context": "context",
+    "gather_scoped": "session",
+    "get_current_access_context": "context",
+    "reset_access_context": "session",
+    "track_connection_access_context": "session",
+    "transaction_local_access_context": "session",
+    "validate_tokens": "batch",
+    "verify_access_context": "session",
+    "dsn_with_tenant": "tenancy",
+    "resolve_websocket_auth_context": "websocket",
+    "websocket_access_context": "websocket",
+    "websocket_auth_context": "websocket",
+    "websocket_compact_access_context": "websocket",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
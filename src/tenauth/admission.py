@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a tenant is over its concurrency or rate limit."""
+
+    def __init__(self, tenant_id: Any, reason: str, retry_after: float) -> None:
+        super().__init__(f"Tenant {tenant_id} rejected: {reason}")
+        self.tenant_id = tenant_id
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _TenantState:
+    tokens: float
+    updated: float
+    last_used: float
+    active: int = 0
+    sleeping: int = 0
+    waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+
+    @property
+    def queued(self) -> int:
+        return len(self.waiters) + self.sleeping
+
+    @property
+    def idle(self) -> bool:
+        return self.active == 0 and self.queued == 0
+
+
+@dataclass(frozen=True)
+class AdmissionStats:
+    """Snapshot of a `TenantAdmissionController`."""
+
+    tenants: int
+    active: int
+    queued: int
+    admitted: int
+    queued_total: int
+    wait_seconds: float
+    max_wait_seconds: float
+    rejected_concurrency: int
+    rejected_rate: int
+    timeouts: int
+
+    @property
+    def rejected(self) -> int:
+        return self.rejected_concurrency + self.rejected_rate + self.timeouts
+
+
+class TenantAdmissionController:
+    """Per-tenant concurrency limit and token-bucket rate limit.
+
+    Each tenant may hold `max_concurrent` admissions at once and start
+    `rate` admissions per second with bursts of up to `burst`. Over the
+    limit, up to `max_queue` callers per tenant wait in FIFO order for at
+    most `timeout` seconds; everyone else is rejected at once with
+    `AdmissionRejected`. Idle tenants are forgotten after `idle_ttl`
+    seconds, and at most `max_tenants` idle tenants are kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int = 5,
+        rate: float | None = None,
+        burst: int | None = None,
+        max_queue: int = 10,
+        timeout: float = 5.0,
+        idle_ttl: float = 300.0,
+        max_tenants: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_concurrent <= 0:
+            raise ValueError("max_concurrent must be positive")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = float(burst if burst is not None else max(1, round(rate or 1)))
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.idle_ttl = idle_ttl
+        self.max_tenants = max_tenants
+        self._clock = clock
+        self._states: OrderedDict[Any, _TenantState] = OrderedDict()
+        self._next_sweep = clock() + idle_ttl
+        self.admitted = 0
+        self.queued_total = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.rejected_concurrency = 0
+        self.rejected_rate = 0
+        self.timeouts = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    @asynccontextmanager
+    async def admit(self, tenant_id: Any) -> AsyncIterator[None]:
+        """Hold one admission for `tenant_id` for the duration of the block."""
+        state = self._state(tenant_id)
+        start = self._clock()
+        deadline = start + self.timeout
+        await self._reserve_rate(tenant_id, state, deadline)
+        await self._acquire(tenant_id, state, deadline)
+        waited = self._clock() - start
+        if waited > 0:
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self._release(state)
+
+    def stats(self) -> AdmissionStats:
+        states = self._states.values()
+        return AdmissionStats(
+            tenants=len(self._states),
+            active=sum(s.active for s in states),
+            queued=sum(s.queued for s in states),
+            admitted=self.admitted,
+            queued_total=self.queued_total,
+            wait_seconds=self.wait_seconds,
+            max_wait_seconds=self.max_wait_seconds,
+            rejected_concurrency=self.rejected_concurrency,
+            rejected_rate=self.rejected_rate,
+            timeouts=self.timeouts,
+        )
+
+    def _state(self, tenant_id: Any) -> _TenantState:
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        state = self._states.get(tenant_id)
+        if state is None:
+            state = _TenantState(tokens=self.burst, updated=now, last_used=now)
+            self._states[tenant_id] = state
+            if len(self._states) > self.max_tenants:
+                self._evict_lru()
+        else:
+            state.last_used = now
+            self._states.move_to_end(tenant_id)
+        return state
+
+    def _sweep(self, now: float) -> None:
+        self._next_sweep = now + self.idle_ttl
+        cutoff = now - self.idle_ttl
+        for tenant_id, state in list(self._states.items()):
+            if state.idle and state.last_used <= cutoff:
+                del self._states[tenant_id]
+
+    def _evict_lru(self) -> None:
+        for tenant_id, state in list(self._states.items()):
+            if len(self._states) <= self.max_tenants:
+                return
+            if state.idle:
+                del self._states[tenant_id]
+
+    async def _reserve_rate(
+        self, tenant_id: Any, state: _TenantState, deadline: float
+    ) -> None:
+        if self.rate is None:
+            return
+        now = self._clock()
+        state.tokens = min(self.burst, state.tokens + (now - state.updated) * self.rate)
+        state.updated = now
+        if state.tokens >= 1:
+            state.tokens -= 1
+            return
+        # reserve a future token; its wait is the time until the bucket covers it
+        wait = (1 - state.tokens) / self.rate
+        if now + wait > deadline or state.queued >= self.max_queue:
+            self.rejected_rate += 1
+            raise AdmissionRejected(tenant_id, "rate limit exceeded", wait)
+        state.tokens -= 1
+        state.sleeping += 1
+        self.queued_total += 1
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            state.sleeping -= 1
+
+    async def _acquire(
+        self, tenant_id: Any, state: _TenantState, deadline: float
+    ) -> None:
+        if state.active < self.max_concurrent and not state.waiters:
+            state.active += 1
+            return
+        if state.queued >= self.max_queue:
+            self.rejected_concurrency += 1
+            raise AdmissionRejected(tenant_id, "too many concurrent sessions", 1.0)
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        self.queued_total += 1
+        try:
+            await asyncio.wait_for(waiter, max(0.0, deadline - self._clock()))
+        except asyncio.TimeoutError:
+            self._abandon(state, waiter)
+            self.timeouts += 1
+            raise AdmissionRejected(tenant_id, "timed out waiting for a session", 1.0)
+        except BaseException:
+            self._abandon(state, waiter)
+            raise
+
+    def _abandon(self, state: _TenantState, waiter: asyncio.Future[None]) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # the slot was handed over just as we gave up; pass it on
+            self._release(state)
+        else:
+            try:
+                state.waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _release(self, state: _TenantState) -> None:
+        while state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                # hand the slot straight to the next waiter; `active` is unchanged
+                waiter.set_result(None)
+                return
+        state.active -= 1
+        state.last_used = self._clock()
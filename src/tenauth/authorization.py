@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+
+from .schemas import AuthContext
+
+SCOPE_SEPARATOR = ":"
+WILDCARD = "*"
+ROLE_HIERARCHY = ("viewer", "editor", "admin", "owner")
+ROLE_RANKS = {role: rank for rank, role in enumerate(ROLE_HIERARCHY)}
+
+
+def _scope_path(scope: str) -> str:
+    suffix = SCOPE_SEPARATOR + WILDCARD
+    return scope[: -len(suffix)] if scope.endswith(suffix) else scope
+
+
+class ScopeRegistry:
+    """Fixed registry of required scopes, each assigned one bit.
+
+    Requirements compile to a bitmask once, when a dependency is built.
+    A token's granted scopes compile to the mask of every registered scope
+    they cover, once per token, so checks are a single `&`.
+
+    A granted scope covers itself and everything below it: `datasets`
+    and `datasets:*` both cover `datasets:read` and `datasets:items:read`,
+    and `*` covers every scope.
+    """
+
+    def __init__(self) -> None:
+        self._bits: dict[str, int] = {}
+        # scope path -> mask of registered scopes at or below it
+        self._covers: dict[str, int] = {WILDCARD: 0}
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    def compile(self, scopes: Iterable[str]) -> int:
+        """Register `scopes` if needed and return their combined mask."""
+        mask = 0
+        for scope in scopes:
+            bit = self._bits.get(scope)
+            if bit is None:
+                bit = self._register(scope)
+            mask |= bit
+        return mask
+
+    def granted_mask(self, ctx: AuthContext) -> int:
+        """Mask of registered scopes covered by `ctx.scopes`, cached on the token.
+
+        The cache entry records the scopes it was computed from, so copies
+        made with `model_copy(update={"scopes": ...})`, which share the
+        cache, and in-place edits of `scopes` are recomputed.
+        """
+        scopes = tuple(ctx.scopes or ())
+        cached = ctx._derived.get(self)
+        if cached is not None and cached[0] == self.version and cached[1] == scopes:
+            return cached[2]
+        covers = self._covers
+        mask = 0
+        for scope in scopes:
+            mask |= covers.get(_scope_path(scope), 0)
+        ctx._derived[self] = (self.version, scopes, mask)
+        return mask
+
+    def has_scopes(self, ctx: AuthContext, required: int) -> bool:
+        return self.granted_mask(ctx) & required == required
+
+    def _register(self, scope: str) -> int:
+        with self._lock:
+            bit = self._bits.get(scope)
+            if bit is not None:
+                return bit
+            bit = 1 << len(self._bits)
+            covers = dict(self._covers)
+            covers[WILDCARD] |= bit
+            path = _scope_path(scope)
+            parts = path.split(SCOPE_SEPARATOR)
+            for i in range(1, len(parts) + 1):
+                prefix = SCOPE_SEPARATOR.join(parts[:i])
+                covers[prefix] = covers.get(prefix, 0) | bit
+            self._covers = covers
+            self._bits[scope] = bit
+            self.version += 1
+            return bit
+
+
+scope_registry = ScopeRegistry()
+
+
+def has_scopes(
+    ctx: AuthContext, *scopes: str, registry: ScopeRegistry | None = None
+) -> bool:
+    """Return True if `ctx` grants every scope in `scopes`."""
+    registry = registry or scope_registry
+    return registry.has_scopes(ctx, registry.compile(scopes))
+
+
+def role_rank(role: str | None) -> int:
+    """Rank of `role` in ROLE_HIERARCHY; -1 for missing or unknown roles."""
+    return ROLE_RANKS.get(role, -1) if role is not None else -1
+
+
+def has_role(ctx: AuthContext, role: str) -> bool:
+    """Return True if `ctx.role` is `role` or ranks above it."""
+    if role not in ROLE_RANKS:
+        raise ValueError(f"Unknown role: {role!r}")
+    return role_rank(ctx.role) >= ROLE_RANKS[role]
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from .cache import TokenCache
+from .jwks import KeyStore
+from .schemas import AuthContext
+
+if TYPE_CHECKING:
+    from .revocation import RevocationIndex
+
+
+@dataclass(frozen=True, slots=True)
+class TokenResult:
+    """Outcome of validating one token in a batch."""
+
+    token: Any
+    context: AuthContext | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def validate_tokens(
+    tokens: Iterable[str],
+    *,
+    cache: TokenCache | None = None,
+    fast: bool | None = None,
+    key_store: KeyStore | None = None,
+    revocation_index: RevocationIndex | None = None,
+) -> list[TokenResult]:
+    """Validate many tokens at once, e.g. for message-queue consumers.
+
+    Results are returned in input order. Identical tokens are validated
+    once and share a result. Failures are reported through
+    `TokenResult.error` instead of raising or logging, also for entries
+    that are not strings. `cache`, `fast`, `key_store` and
+    `revocation_index` default to the `AuthContext` class settings, as in
+    `AuthContext.from_token`, so revoked tokens fail. A leading `Bearer `
+    prefix is accepted.
+    """
+    seen: dict[str, TokenResult] = {}
+    results = []
+    for token in tokens:
+        if not isinstance(token, str):
+            error = f"Token must be a string, not {type(token).__name__}"
+            results.append(TokenResult(token=token, error=error))
+            continue
+        result = seen.get(token)
+        if result is None:
+            result = _validate(
+                token,
+                cache=cache,
+                fast=fast,
+                key_store=key_store,
+                revocation_index=revocation_index,
+            )
+            seen[token] = result
+        results.append(result)
+    return results
+
+
+def _validate(
+    token: str,
+    *,
+    cache: TokenCache | None,
+    fast: bool | None,
+    key_store: KeyStore | None,
+    revocation_index: RevocationIndex | None,
+) -> TokenResult:
+    raw = token
+    if raw[:7].lower() == "bearer ":
+        raw = raw[7:].strip()
+    if not raw:
+        return TokenResult(token=token, error="Missing token")
+    try:
+        ctx = AuthContext._resolve_token(
+            raw,
+            cache=cache,
+            fast=fast,
+            key_store=key_store,
+            revocation_index=revocation_index,
+        )
+    except Exception as e:
+        return TokenResult(token=token, error=f"{type(e).__name__}: {e}")
+    return TokenResult(token=token, context=ctx)
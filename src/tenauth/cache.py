@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .schemas import AuthContext
+
+
+@dataclass(frozen=True)
+class TokenCacheStats:
+    """Snapshot of the counters kept by a `TokenCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+    max_size: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class TokenCache:
+    """Size-bounded LRU/TTL cache of parsed tokens.
+
+    Entries are keyed by the raw token string and expire after `ttl` seconds
+    or at the token's `exp` claim, whichever comes first. Tokens that are
+    already expired, or expire within `min_ttl` seconds, are not cached.
+
+    Every caller gets its own copy of the cached context, so a handler that
+    edits `scopes`, `role` or `plan` in place never affects other requests
+    with the same token.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 1024,
+        ttl: float = 300.0,
+        min_ttl: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.min_ttl = min_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, AuthContext]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> AuthContext | None:
+        """Return the cached context for `token`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            deadline, ctx = entry
+            if deadline <= self._clock():
+                del self._entries[token]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+        return ctx.detached()
+
+    def put(self, token: str, ctx: AuthContext) -> None:
+        """Cache `ctx` for `token` unless its remaining lifetime is too short."""
+        deadline = self._clock() + self.ttl
+        if ctx.exp is not None:
+            deadline = min(deadline, float(ctx.exp))
+        if deadline - self._clock() < self.min_ttl:
+            return
+        ctx = ctx.detached()
+        with self._lock:
+            self._entries[token] = (deadline, ctx)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, token: str) -> None:
+        """Drop a single token from the cache."""
+        with self._lock:
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        """Drop all entries; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> TokenCacheStats:
+        return TokenCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=self.expirations,
+            size=len(self._entries),
+            max_size=self.max_size,
+        )
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, Awaitable, Callable, Generator
+from typing import Any
+from uuid import UUID
+
+import httpx
+
+from .schemas import AuthContext
+from .utils import claims_key
+
+logger = logging.getLogger(__name__)
+
+TokenFactory = Callable[[AuthContext], "str | Awaitable[str]"]
+
+
+def _token_exp(token: str) -> float | None:
+    try:
+        segment = token.split(".")[1]
+        payload = json.loads(
+            base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+        )
+    except Exception:
+        return None
+    exp = payload.get("exp") if isinstance(payload, dict) else None
+    return float(exp) if exp is not None else None
+
+
+def _strip_bearer(token: str) -> str:
+    if token[:7].lower() == "bearer ":
+        return token[7:].strip()
+    return token
+
+
+class BearerAuth(httpx.Auth):
+    """httpx auth that sends a bearer token minted for an AuthContext.
+
+    Tokens come from `token_factory` (e.g. `TokenMinter.mint`) and are
+    reused until `refresh_margin` seconds before their `exp`. Inside that
+    window the current token is still sent while a single background
+    refresh runs; once it has expired, concurrent requests wait on one
+    in-flight refresh. A 401 response triggers one retry with a new token.
+    """
+
+    def __init__(
+        self,
+        ctx: AuthContext,
+        token_factory: TokenFactory,
+        *,
+        refresh_margin: float = 60.0,
+        background_refresh: bool = True,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ctx = ctx
+        self.refresh_margin = refresh_margin
+        self.background_refresh = background_refresh
+        self._token_factory = token_factory
+        self._clock = clock
+        # (token, refresh_at, expires_at), swapped as a whole
+        self._state: tuple[str, float, float] | None = None
+        self._thread_lock = threading.Lock()
+        self._refresh_thread: threading.Thread | None = None
+        self._async_lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task[None] | None = None
+        self.refreshes = 0
+
+    def invalidate(self) -> None:
+        """Drop the cached token so the next request mints a new one."""
+        self._state = None
+
+    def sync_auth_flow(
+        self, request: httpx.Request
+    ) -> Generator[httpx.Request, httpx.Response, None]:
+        token = self.sync_token()
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401:
+            self._discard(token)
+            request.headers["Authorization"] = f"Bearer {self.sync_token()}"
+            yield request
+
+    async def async_auth_flow(
+        self, request: httpx.Request
+    ) -> AsyncGenerator[httpx.Request, httpx.Response]:
+        token = await self.async_token()
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = yield request
+        if response.status_code == 401:
+            self._discard(token)
+            request.headers["Authorization"] = f"Bearer {await self.async_token()}"
+            yield request
+
+    def sync_token(self) -> str:
+        """Return a usable token, minting one under a lock when needed."""
+        state = self._state
+        now = self._clock()
+        if state is not None and now < state[1]:
+            return state[0]
+        if state is not None and now < state[2] and self.background_refresh:
+            self._start_thread_refresh()
+            return state[0]
+        with self._thread_lock:
+            state = self._state
+            if state is None or self._clock() >= state[1]:
+                state = self._store(self._mint_sync())
+        return state[0]
+
+    async def async_token(self) -> str:
+        """Async variant of `sync_token`; refreshes are shared between tasks."""
+        state = self._state
+        now = self._clock()
+        if state is not None and now < state[1]:
+            return state[0]
+        if state is not None and now < state[2] and self.background_refresh:
+            self._start_task_refresh()
+            return state[0]
+        async with self._async_lock:
+            state = self._state
+            if state is None or self._clock() >= state[1]:
+                state = self._store(await self._mint_async())
+        return state[0]
+
+    def _discard(self, token: str) -> None:
+        state = self._state
+        if state is not None and state[0] == token:
+            self._state = None
+
+    def _store(self, token: str) -> tuple[str, float, float]:
+        token = _strip_bearer(token)
+        exp = _token_exp(token)
+        if exp is None:
+            state = (token, float("inf"), float("inf"))
+        else:
+            state = (token, exp - self.refresh_margin, exp)
+        self._state = state
+        self.refreshes += 1
+        return state
+
+    def _mint_sync(self) -> str:
+        token = self._token_factory(self.ctx)
+        if inspect.isawaitable(token):
+            raise TypeError("Synchronous requests need a synchronous token_factory")
+        return token
+
+    async def _mint_async(self) -> str:
+        token = self._token_factory(self.ctx)
+        if inspect.isawaitable(token):
+            token = await token
+        return token
+
+    def _start_thread_refresh(self) -> None:
+        with self._thread_lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(
+                target=self._refresh_in_thread,
+                name="tenauth-token-refresh",
+                daemon=True,
+            )
+            self._refresh_thread.start()
+
+    def _refresh_in_thread(self) -> None:
+        try:
+            token = self._mint_sync()
+        except Exception as e:
+            logger.warning(f"Background token refresh failed: {e}")
+            return
+        with self._thread_lock:
+            self._store(token)
+
+    def _start_task_refresh(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self._refresh_in_task()
+        )
+
+    async def _refresh_in_task(self) -> None:
+        async with self._async_lock:
+            state = self._state
+            if state is not None and self._clock() < state[1]:
+                return
+            try:
+                self._store(await self._mint_async())
+            except Exception as e:
+                logger.warning(f"Background token refresh failed: {e}")
+
+
+class TenantClients:
+    """One pooled httpx client per tenant, with a `BearerAuth` per claim set.
+
+    Clients are created on first use with `client_factory` (default
+    `httpx.AsyncClient`; pass `httpx.Client` for synchronous code) and
+    `client_kwargs`, so connections to a tenant's services are reused
+    across requests. Auths are keyed on every claim that is minted into
+    the token, so a context with narrower scopes never gets a broader
+    token; the `max_auths` most recently used are kept. Send requests
+    with the auth for the calling context:
+
+        client = clients.client(ctx.tid)
+        await client.get(url, auth=clients.auth(ctx))
+    """
+
+    def __init__(
+        self,
+        token_factory: TokenFactory,
+        *,
+        client_factory: Callable[
+            ..., httpx.Client | httpx.AsyncClient
+        ] = httpx.AsyncClient,
+        refresh_margin: float = 60.0,
+        background_refresh: bool = True,
+        max_auths: int = 1024,
+        clock: Callable[[], float] = time.time,
+        **client_kwargs: Any,
+    ) -> None:
+        if max_auths <= 0:
+            raise ValueError("max_auths must be positive")
+        self.max_auths = max_auths
+        self._token_factory = token_factory
+        self._client_factory = client_factory
+        self._client_kwargs = client_kwargs
+        self._auth_kwargs = {
+            "refresh_margin": refresh_margin,
+            "background_refresh": background_refresh,
+            "clock": clock,
+        }
+        self._clients: dict[UUID, httpx.Client | httpx.AsyncClient] = {}
+        self._auths: OrderedDict[tuple, BearerAuth] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def client(self, tenant_id: UUID) -> Any:
+        """Return the pooled client for `tenant_id`, creating it on first use."""
+        client = self._clients.get(tenant_id)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(tenant_id)
+                if client is None:
+                    client = self._client_factory(**self._client_kwargs)
+                    self._clients[tenant_id] = client
+        return client
+
+    def auth(self, ctx: AuthContext) -> BearerAuth:
+        """Return the shared `BearerAuth` for the claims in `ctx`."""
+        key = claims_key(ctx)
+        with self._lock:
+            auth = self._auths.get(key)
+            if auth is None:
+                auth = BearerAuth(ctx, self._token_factory, **self._auth_kwargs)
+                self._auths[key] = auth
+                while len(self._auths) > self.max_auths:
+                    self._auths.popitem(last=False)
+            else:
+                self._auths.move_to_end(key)
+        return auth
+
+    def close(self) -> None:
+        """Close synchronous clients and forget all clients and tokens."""
+        clients = self._reset()
+        for client in clients:
+            client.close()  # type: ignore[union-attr]
+
+    async def aclose(self) -> None:
+        """Close async clients and forget all clients and tokens."""
+        clients = self._reset()
+        for client in clients:
+            await client.aclose()  # type: ignore[union-attr]
+
+    def _reset(self) -> list[httpx.Client | httpx.AsyncClient]:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._auths.clear()
+        return clients
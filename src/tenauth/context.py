@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from .schemas import AnyAccessContext
+
+current_access_context: ContextVar[AnyAccessContext | None] = ContextVar(
+    "tenauth.current_access_context", default=None
+)
+
+
+def get_current_access_context() -> AnyAccessContext:
+    """Return the access context bound to the running task, else raise RuntimeError."""
+    access_context = current_access_context.get()
+    if access_context is None:
+        raise RuntimeError("No access context is bound; use bind_access_context()")
+    return access_context
+
+
+@contextmanager
+def bind_access_context(access_context: AnyAccessContext) -> Iterator[AnyAccessContext]:
+    """Bind `access_context` to the current task for the duration of the block.
+
+    Tasks started inside the block inherit the binding; it is restored to
+    its previous value on exit, so nothing leaks into unrelated work.
+    """
+    token = current_access_context.set(access_context)
+    try:
+        yield access_context
+    finally:
+        current_access_context.reset(token)
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any
+
+from .schemas import AuthContext
+
+Limit = int | float | None
+
+_EMPTY_LIMITS: Mapping[str, Limit] = MappingProxyType({})
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Entitlements:
+    """Immutable view of a plan: its name, feature flags and numeric limits.
+
+    A limit of None means unlimited; a limit that is not set at all is
+    reported as `default` by `limit()`.
+    """
+
+    plan: str | None = None
+    features: frozenset[str] = frozenset()
+    limits: Mapping[str, Limit] = field(default_factory=lambda: _EMPTY_LIMITS)
+
+    def has_feature(self, feature: str) -> bool:
+        return feature in self.features
+
+    def limit(self, name: str, default: Limit = 0) -> Limit:
+        return self.limits.get(name, default)
+
+    def within_limit(self, name: str, value: int | float) -> bool:
+        """Return True if `value` does not exceed the limit `name`."""
+        limit = self.limits.get(name, 0)
+        return limit is None or value <= limit
+
+
+def _features(value: Any) -> set[str]:
+    if value is None:
+        return set()
+    if isinstance(value, Mapping):
+        return {str(name) for name, enabled in value.items() if enabled}
+    if isinstance(value, str):
+        return {name for name in value.split(" ") if name}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return {str(name) for name in value}
+    raise ValueError(f"Invalid features: {value!r}")
+
+
+def _limits(value: Any) -> dict[str, Limit]:
+    if value is None:
+        return {}
+    if not isinstance(value, Mapping):
+        raise ValueError(f"Invalid limits: {value!r}")
+    limits: dict[str, Limit] = {}
+    for name, limit in value.items():
+        if limit is not None and (
+            isinstance(limit, bool) or not isinstance(limit, (int, float))
+        ):
+            raise ValueError(f"Invalid limit {name!r}: {limit!r}")
+        limits[str(name)] = limit
+    return limits
+
+
+class EntitlementCache:
+    """Compile plan claims into shared `Entitlements` instances.
+
+    A string claim names a plan in `plans`; a dict claim may name a base
+    plan under `plan` (or `name`), add or switch off `features` and
+    override `limits`.
+    Results are cached by a hash of the claim's content, so every token
+    carrying the same plan shares one instance, and memoised on the
+    AuthContext itself, so cached tokens skip even the hashing.
+    """
+
+    def __init__(
+        self,
+        plans: Mapping[str, Mapping[str, Any]] | None = None,
+        *,
+        max_size: int = 1024,
+    ) -> None:
+        self.plans: dict[str, Mapping[str, Any]] = dict(plans or {})
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, Entitlements] = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def for_context(self, ctx: AuthContext) -> Entitlements:
+        """Return the entitlements for `ctx.plan`.
+
+        The memoised entry records the claim it was resolved from, so copies
+        with a different `plan` (which share the memo) are resolved again.
+        """
+        plan = ctx.plan
+        cached = ctx._derived.get(self)
+        if cached is not None and cached[0] == self.version and cached[1] == plan:
+            return cached[2]
+        entitlements = self.resolve(plan)
+        snapshot = copy.deepcopy(plan) if isinstance(plan, dict) else plan
+        ctx._derived[self] = (self.version, snapshot, entitlements)
+        return entitlements
+
+    def resolve(self, claim: str | Mapping[str, Any] | None) -> Entitlements:
+        """Return the entitlements for a raw plan claim."""
+        key = _content_hash(claim)
+        with self._lock:
+            entitlements = self._entries.get(key)
+            if entitlements is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entitlements
+        entitlements = self._compile(claim)
+        with self._lock:
+            self.misses += 1
+            entitlements = self._entries.setdefault(key, entitlements)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entitlements
+
+    def load_plans(self, plans: Mapping[str, Mapping[str, Any]]) -> None:
+        """Replace the plan catalogue; previously compiled entitlements are dropped."""
+        with self._lock:
+            self.plans = dict(plans)
+            self._entries.clear()
+            self.version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+
+    def _compile(self, claim: str | Mapping[str, Any] | None) -> Entitlements:
+        if claim is None:
+            return Entitlements()
+        if isinstance(claim, str):
+            claim = {"plan": claim}
+        if not isinstance(claim, Mapping):
+            raise ValueError(f"Invalid plan claim: {claim!r}")
+        name = claim.get("plan", claim.get("name"))
+        if name is not None and not isinstance(name, str):
+            raise ValueError(f"Invalid plan name: {name!r}")
+        base = self.plans.get(name, {}) if name is not None else {}
+        features = _features(base.get("features")) | _features(claim.get("features"))
+        overrides = claim.get("features")
+        if isinstance(overrides, Mapping):
+            features -= {
+                str(name) for name, enabled in overrides.items() if not enabled
+            }
+        limits = _limits(base.get("limits"))
+        limits.update(_limits(claim.get("limits")))
+        return Entitlements(
+            plan=name,
+            features=frozenset(features),
+            limits=MappingProxyType(limits) if limits else _EMPTY_LIMITS,
+        )
+
+
+def _content_hash(claim: Any) -> bytes:
+    raw = json.dumps(claim, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+
+entitlement_cache = EntitlementCache()
+
+
+def resolve_entitlements(ctx: AuthContext) -> Entitlements:
+    """Entitlements for `ctx` from the shared `entitlement_cache`."""
+    return entitlement_cache.for_context(ctx)
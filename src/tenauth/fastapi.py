@@ -1,15 +1,26 @@
+import math
 import warnings
-from collections.abc import AsyncIterator, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack
+from typing import TYPE_CHECKING, Any
 
 from fastapi import Depends, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 
+from . import instrumentation
+from .admission import AdmissionRejected, TenantAdmissionController
+from .authorization import ROLE_RANKS, ScopeRegistry, role_rank, scope_registry
+from .entitlements import EntitlementCache, Entitlements, entitlement_cache
+from .jwks import TokenVerificationError
 from .schemas import AccessContext, AuthContext
 from .session import SessionFactory, access_scoped_session_ctx
 from fastapi import HTTPException
 
+if TYPE_CHECKING:
+    from .introspection import IntrospectionClient
+
 AUTHORIZATION_KEY = 'authorization'
 BEARER_SCHEME = HTTPBearer(auto_error=False)
 
@@ -29,9 +40,33 @@ async def get_auth_context(
 ) -> AuthContext:
     """Require Authorization header and return an AuthContext, else raise 401."""
     token = await get_bearer_token(credentials)
+    if instrumentation.hooks:
+        with instrumentation.measure(
+            instrumentation.AUTH_PARSE, cache=AuthContext.token_cache
+        ):
+            return AuthContext.from_token(token)
     return AuthContext.from_token(token)
 
 
+def build_introspection_auth_dependency(
+    client: "IntrospectionClient",
+) -> Callable[..., Awaitable[AuthContext]]:
+    """Create a dependency that resolves the bearer token by introspection, else 401."""
+
+    async def dependency(
+        credentials: HTTPAuthorizationCredentials | None = Security(BEARER_SCHEME),
+    ) -> AuthContext:
+        token = await get_bearer_token(credentials)
+        try:
+            return await client.auth_context(token)
+        except TokenVerificationError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+            )
+
+    return dependency
+
+
 async def get_access_context(
     auth: AuthContext = Depends(get_auth_context),
 ) -> AccessContext:
@@ -39,6 +74,81 @@ async def get_access_context(
     return AccessContext(tenant_id=auth.tid, user_id=auth.sub)
 
 
+def require_scopes(
+    *scopes: str,
+    registry: ScopeRegistry | None = None,
+    auth_dependency: Callable[..., Any] = get_auth_context,
+) -> Callable[..., Awaitable[AuthContext]]:
+    """Dependency that returns the AuthContext if it grants all `scopes`, else 403."""
+    registry = registry or scope_registry
+    required = registry.compile(scopes)
+
+    async def dependency(auth: AuthContext = Depends(auth_dependency)) -> AuthContext:
+        if not registry.has_scopes(auth, required):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient scope"
+            )
+        return auth
+
+    return dependency
+
+
+def require_role(
+    role: str,
+    *,
+    auth_dependency: Callable[..., Any] = get_auth_context,
+) -> Callable[..., Awaitable[AuthContext]]:
+    """Create a dependency that requires `role` or a higher one, else 403."""
+    if role not in ROLE_RANKS:
+        raise ValueError(f"Unknown role: {role!r}")
+    minimum = ROLE_RANKS[role]
+
+    async def dependency(auth: AuthContext = Depends(auth_dependency)) -> AuthContext:
+        if role_rank(auth.role) < minimum:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient role"
+            )
+        return auth
+
+    return dependency
+
+
+async def get_entitlements(
+    auth: AuthContext = Depends(get_auth_context),
+) -> Entitlements:
+    """Resolve the plan claim through the shared entitlement cache, else 403."""
+    try:
+        return entitlement_cache.for_context(auth)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid entitlements"
+        )
+
+
+def require_feature(
+    feature: str,
+    *,
+    cache: EntitlementCache | None = None,
+    auth_dependency: Callable[..., Any] = get_auth_context,
+) -> Callable[..., Awaitable[Entitlements]]:
+    """Create a dependency that returns the Entitlements with `feature` on, else 403."""
+
+    async def dependency(auth: AuthContext = Depends(auth_dependency)) -> Entitlements:
+        try:
+            entitlements = (cache or entitlement_cache).for_context(auth)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Invalid entitlements"
+            )
+        if not entitlements.has_feature(feature):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Feature not available"
+            )
+        return entitlements
+
+    return dependency
+
+
 async def require_auth(
     credentials: HTTPAuthorizationCredentials | None = Security(BEARER_SCHEME),
 )-> AuthContext:
@@ -67,17 +177,45 @@ def build_access_scoped_session_dependency(
     session_factory: SessionFactory,
     *,
     verify: bool = True,
+    single_statement: bool = False,
+    reuse_connection: bool = False,
+    transaction_local: bool = False,
+    lazy: bool = False,
+    access_context_dependency: Callable[..., Any] = get_access_context,
+    admission: TenantAdmissionController | None = None,
 ) -> Callable[..., AsyncIterator[AsyncSession]]:
-    """Create a FastAPI dependency that yields a scoped session."""
+    """Create a FastAPI dependency that yields a scoped session.
+
+    Pass `access_context_dependency=get_scope_access_context` to reuse the
+    context resolved by `AuthContextMiddleware`. With `admission`, each
+    session first needs an admission for its tenant; rejected requests get
+    a 429 with a `Retry-After` header.
+    """
 
     async def dependency(
-        tenant: AccessContext = Depends(get_access_context),
+        tenant: AccessContext = Depends(access_context_dependency),
     ) -> AsyncIterator[AsyncSession]:
-        async with access_scoped_session_ctx(
-            session_factory=session_factory,
-            access_context=tenant,
-            verify=verify,
-        ) as session:
+        async with AsyncExitStack() as stack:
+            if admission is not None:
+                try:
+                    await stack.enter_async_context(admission.admit(tenant.tenant_id))
+                except AdmissionRejected as e:
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="Too many concurrent requests for this tenant",
+                        headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+                    ) from e
+            session = await stack.enter_async_context(
+                access_scoped_session_ctx(
+                    session_factory=session_factory,
+                    access_context=tenant,
+                    verify=verify,
+                    single_statement=single_statement,
+                    reuse_connection=reuse_connection,
+                    transaction_local=transaction_local,
+                    lazy=lazy,
+                )
+            )
             yield session
 
     return dependency
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+AUTH_PARSE = "auth.parse"
+AUTH_INTROSPECT = "auth.introspect"
+WEBSOCKET_AUTH = "websocket.auth"
+SESSION_APPLY = "session.apply"
+SESSION_VERIFY = "session.verify"
+SESSION_RESET = "session.reset"
+
+
+@dataclass(frozen=True)
+class InstrumentationEvent:
+    """One timed operation reported to instrumentation hooks."""
+
+    name: str
+    duration: float
+    round_trips: int = 0
+    error: str | None = None
+    cache_hit: bool | None = None
+    attributes: Mapping[str, Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class InstrumentationHook(Protocol):
+    def __call__(self, event: InstrumentationEvent) -> None: ...
+
+
+hooks: list[InstrumentationHook] = []
+
+
+def add_hook(hook: InstrumentationHook) -> None:
+    """Register `hook` to receive every InstrumentationEvent."""
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def remove_hook(hook: InstrumentationHook) -> None:
+    if hook in hooks:
+        hooks.remove(hook)
+
+
+def emit(event: InstrumentationEvent) -> None:
+    for hook in list(hooks):
+        try:
+            hook(event)
+        except Exception:
+            # instrumentation must never break the request path
+            logger.exception(f"Instrumentation hook {hook!r} failed")
+
+
+def measure(
+    name: str, *, round_trips: int = 0, cache: Any = None, **attributes: Any
+) -> "_Measurement":
+    """Time a block and emit an InstrumentationEvent when it exits.
+
+    When a `TokenCache` is passed, the event records whether the block was
+    served from it. Callers check `hooks` first, so nothing is timed when
+    no hook is registered.
+    """
+    return _Measurement(name, round_trips, cache, attributes)
+
+
+class _Measurement:
+    __slots__ = ("name", "round_trips", "cache", "attributes", "_start", "_hits")
+
+    def __init__(
+        self, name: str, round_trips: int, cache: Any, attributes: dict[str, Any]
+    ) -> None:
+        self.name = name
+        self.round_trips = round_trips
+        self.cache = cache
+        self.attributes = attributes
+
+    def __enter__(self) -> "_Measurement":
+        self._hits = self.cache.hits if self.cache is not None else 0
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        duration = time.perf_counter() - self._start
+        error = None
+        cache_hit = None
+        if exc is not None:
+            detail = getattr(exc, "detail", None) or str(exc)
+            error = f"{type(exc).__name__}: {detail}" if detail else type(exc).__name__
+        elif self.cache is not None:
+            cache_hit = self.cache.hits > self._hits
+        emit(
+            InstrumentationEvent(
+                name=self.name,
+                duration=duration,
+                round_trips=self.round_trips,
+                error=error,
+                cache_hit=cache_hit,
+                attributes=self.attributes,
+            )
+        )
+
+
+class OpenTelemetryHook:
+    """Record events as OpenTelemetry metrics (`tenauth[otel]`)."""
+
+    def __init__(self, meter: Any = None) -> None:
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise RuntimeError(
+                "OpenTelemetryHook requires 'opentelemetry-api'; install tenauth[otel]"
+            ) from e
+        meter = meter or metrics.get_meter("tenauth")
+        self._duration = meter.create_histogram(
+            "tenauth.operation.duration", unit="s", description="tenauth operation time"
+        )
+        self._round_trips = meter.create_counter(
+            "tenauth.operation.round_trips", description="database round trips"
+        )
+        self._cache = meter.create_counter(
+            "tenauth.cache.lookups", description="token cache lookups"
+        )
+
+    def __call__(self, event: InstrumentationEvent) -> None:
+        attributes = {"operation": event.name, "outcome": _outcome(event)}
+        self._duration.record(event.duration, attributes)
+        if event.round_trips:
+            self._round_trips.add(event.round_trips, attributes)
+        if event.cache_hit is not None:
+            self._cache.add(
+                1,
+                {
+                    "operation": event.name,
+                    "result": "hit" if event.cache_hit else "miss",
+                },
+            )
+
+
+class PrometheusHook:
+    """Record events as Prometheus metrics (`tenauth[prometheus]`)."""
+
+    def __init__(self, registry: Any = None, *, namespace: str = "tenauth") -> None:
+        try:
+            from prometheus_client import REGISTRY, Counter, Histogram
+        except ImportError as e:
+            raise RuntimeError(
+                "PrometheusHook requires 'prometheus-client'; "
+                "install tenauth[prometheus]"
+            ) from e
+        registry = registry or REGISTRY
+        self._duration = Histogram(
+            "operation_duration_seconds",
+            "tenauth operation time",
+            ["operation", "outcome"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self._round_trips = Counter(
+            "operation_round_trips",
+            "database round trips",
+            ["operation"],
+            namespace=namespace,
+            registry=registry,
+        )
+        self._cache = Counter(
+            "cache_lookups",
+            "token cache lookups",
+            ["operation", "result"],
+            namespace=namespace,
+            registry=registry,
+        )
+
+    def __call__(self, event: InstrumentationEvent) -> None:
+        self._duration.labels(event.name, _outcome(event)).observe(event.duration)
+        if event.round_trips:
+            self._round_trips.labels(event.name).inc(event.round_trips)
+        if event.cache_hit is not None:
+            self._cache.labels(event.name, "hit" if event.cache_hit else "miss").inc()
+
+
+def _outcome(event: InstrumentationEvent) -> str:
+    if event.error is None:
+        return "ok"
+    return event.error.split(":", 1)[0]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+
+from . import instrumentation
+from .jwks import TokenVerificationError
+from .schemas import AuthContext
+
+logger = logging.getLogger(__name__)
+
+
+class IntrospectionClient:
+    """Resolve tokens through an RFC 7662 introspection endpoint.
+
+    Active tokens are cached until their `exp` (at most `max_ttl` seconds),
+    inactive ones for `negative_ttl` seconds. Concurrent lookups of the same
+    token share one request. Each caller gets its own copy of the context.
+    Endpoint failures are never cached.
+
+    `auth` authenticates the caller to the endpoint (e.g. a
+    `(client_id, client_secret)` tuple). Pass `client` to reuse a pooled
+    `httpx.AsyncClient`, or one with a stand-in transport in tests.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        auth: httpx.Auth | tuple[str, str] | None = None,
+        client: httpx.AsyncClient | None = None,
+        token_type_hint: str | None = "access_token",
+        max_ttl: float = 300.0,
+        negative_ttl: float = 10.0,
+        cache_size: int = 4096,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.url = url
+        self.auth = auth
+        self.token_type_hint = token_type_hint
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.cache_size = cache_size
+        self._client = client
+        self._owns_client = client is None
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, AuthContext | None]] = (
+            OrderedDict()
+        )
+        self._inflight: dict[str, asyncio.Task[AuthContext | None]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.requests = 0
+
+    async def auth_context(self, token: str) -> AuthContext:
+        """Return the AuthContext of an active token, else TokenVerificationError."""
+        ctx = await self.lookup(token)
+        if ctx is None:
+            raise TokenVerificationError("Token is not active")
+        return ctx
+
+    async def lookup(self, token: str) -> AuthContext | None:
+        """Return the AuthContext for `token`, or None when it is not active."""
+        entry = self._entries.get(token)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[1].detached() if entry[1] is not None else None
+            self._entries.pop(token, None)
+        self.misses += 1
+
+        pending = self._inflight.get(token)
+        if pending is None:
+            # the request runs in its own task, so a caller that is cancelled
+            # does not cancel it for the others waiting on the same token
+            pending = asyncio.get_running_loop().create_task(self._fetch(token))
+            self._inflight[token] = pending
+            pending.add_done_callback(functools.partial(self._settled, token))
+        ctx = await asyncio.shield(pending)
+        # waiters share the task's result; each gets its own copy
+        return ctx.detached() if ctx is not None else None
+
+    def invalidate(self, token: str) -> None:
+        """Drop a cached result, e.g. after learning a token was revoked."""
+        self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if this instance created it."""
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch(self, token: str) -> AuthContext | None:
+        ctx = await self._introspect(token)
+        self._remember(token, ctx)
+        return ctx
+
+    def _settled(self, token: str, task: asyncio.Task[AuthContext | None]) -> None:
+        if self._inflight.get(token) is task:
+            del self._inflight[token]
+        if not task.cancelled():
+            # mark retrieved so a lookup whose callers all left doesn't warn
+            task.exception()
+
+    async def _introspect(self, token: str) -> AuthContext | None:
+        if instrumentation.hooks:
+            with instrumentation.measure(
+                instrumentation.AUTH_INTROSPECT, round_trips=1
+            ):
+                return await self._request(token)
+        return await self._request(token)
+
+    async def _request(self, token: str) -> AuthContext | None:
+        if self._client is None:
+            self._client = httpx.AsyncClient()
+        data = {"token": token}
+        if self.token_type_hint:
+            data["token_type_hint"] = self.token_type_hint
+        self.requests += 1
+        try:
+            response = await self._client.post(
+                self.url,
+                data=data,
+                auth=self.auth if self.auth is not None else httpx.USE_CLIENT_DEFAULT,
+                headers={"Accept": "application/json"},
+            )
+            response.raise_for_status()
+            payload: Any = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise TokenVerificationError(f"Introspection failed: {e}") from e
+
+        if not isinstance(payload, dict):
+            logger.warning(
+                f"Introspection response is not a JSON object: {payload!r:.100}"
+            )
+            return None
+        if not payload.get("active"):
+            return None
+        if "scopes" not in payload and "scope" in payload:
+            payload["scopes"] = payload.pop("scope")
+        try:
+            return AuthContext._from_claims(payload)
+        except Exception as e:
+            logger.warning(f"Introspection response is not a valid AuthContext: {e}")
+            return None
+
+    def _remember(self, token: str, ctx: AuthContext | None) -> None:
+        now = self._clock()
+        if ctx is None:
+            deadline = now + self.negative_ttl
+        else:
+            deadline = now + self.max_ttl
+            if ctx.exp is not None:
+                deadline = min(deadline, float(ctx.exp))
+        if deadline <= now:
+            return
+        self._entries[token] = (deadline, ctx)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.cache_size:
+            self._entries.popitem(last=False)
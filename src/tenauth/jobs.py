@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .context import bind_access_context
+from .schemas import AnyAccessContext
+from .session import SessionFactory, transaction_local_access_context
+
+logger = logging.getLogger(__name__)
+
+TenantJob = Callable[[AsyncSession, AnyAccessContext], Awaitable[Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class TenantJobResult:
+    """Outcome of running the job for one tenant."""
+
+    tenant_id: Any
+    duration: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class TenantJobReport:
+    """Results of a `TenantJobRunner.run`, in input order."""
+
+    results: list[TenantJobResult]
+    skipped: int
+    duration: float
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> list[TenantJobResult]:
+        return [result for result in self.results if not result.ok]
+
+
+class _Checkpoint:
+    """Append-only file with one completed tenant id per line."""
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+        self._fh: Any = None
+
+    def load(self) -> set[str]:
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                # a line without newline was cut off mid-write by a crash
+                return {line[:-1] for line in fh if line.endswith("\n")}
+        except FileNotFoundError:
+            return set()
+
+    def record(self, tenant_id: Any) -> None:
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(f"{tenant_id}\n")
+        self._fh.flush()
+
+    def close(self, *, remove: bool) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if remove:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class TenantJobRunner:
+    """Run an async job for many tenants over a few long-lived sessions.
+
+    Up to `concurrency` workers each open one session from `session_factory`
+    and process tenants one after another. While a tenant's job runs with
+    `(session, access_context)`, every transaction the session begins gets
+    the tenant's GUCs with transaction scope in a single statement, also
+    after the job commits part way through. The runner commits at the end,
+    or rolls back if the job raised. Committing ends the settings, so there
+    is no reset round trip and a connection never returns to the pool
+    carrying a batch tenant's context. A session whose rollback fails is
+    replaced.
+
+    With `checkpoint`, each tenant that succeeds is appended to that file,
+    and tenants listed there are skipped on the next run, so a crashed run
+    resumes where it stopped. Failed tenants are retried. The file is
+    removed once a run finishes without failures.
+    """
+
+    def __init__(
+        self,
+        session_factory: SessionFactory,
+        *,
+        concurrency: int = 8,
+        checkpoint: str | os.PathLike[str] | None = None,
+        verify: bool = True,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        if concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.checkpoint = checkpoint
+        self.verify = verify
+        self._clock = clock
+
+    async def run(
+        self, tenants: Iterable[AnyAccessContext], job: TenantJob
+    ) -> TenantJobReport:
+        """Run `job` once per access context in `tenants` and report the results."""
+        start = self._clock()
+        checkpoint = (
+            _Checkpoint(self.checkpoint) if self.checkpoint is not None else None
+        )
+        done = checkpoint.load() if checkpoint is not None else set()
+        pending = []
+        skipped = 0
+        for access_context in tenants:
+            if str(access_context.tenant_id) in done:
+                skipped += 1
+            else:
+                pending.append(access_context)
+
+        results: list[TenantJobResult | None] = [None] * len(pending)
+        queue = iter(enumerate(pending))
+        workers = min(self.concurrency, len(pending))
+        tasks = [
+            asyncio.ensure_future(self._worker(queue, job, results, checkpoint))
+            for _ in range(workers)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            finished = [result for result in results if result is not None]
+            if checkpoint is not None:
+                complete = len(finished) == len(pending) and all(r.ok for r in finished)
+                checkpoint.close(remove=complete)
+
+        return TenantJobReport(
+            results=finished, skipped=skipped, duration=self._clock() - start
+        )
+
+    async def _worker(
+        self,
+        queue: Iterator[tuple[int, AnyAccessContext]],
+        job: TenantJob,
+        results: list[TenantJobResult | None],
+        checkpoint: _Checkpoint | None,
+    ) -> None:
+        exhausted = False
+        while not exhausted:
+            async with self.session_factory() as session:
+                exhausted = True
+                # the iterator is shared, so workers pull tenants as they free up
+                for index, access_context in queue:
+                    result, reusable = await self._run_one(session, access_context, job)
+                    results[index] = result
+                    if result.ok and checkpoint is not None:
+                        checkpoint.record(access_context.tenant_id)
+                    if not reusable:
+                        exhausted = False
+                        break
+
+    async def _run_one(
+        self, session: AsyncSession, access_context: AnyAccessContext, job: TenantJob
+    ) -> tuple[TenantJobResult, bool]:
+        start = self._clock()
+        error = None
+        reusable = True
+        try:
+            with bind_access_context(access_context):
+                async with transaction_local_access_context(
+                    session, access_context, verify=self.verify
+                ):
+                    await job(session, access_context)
+                    await session.commit()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Job failed for tenant {access_context.tenant_id}: {error}")
+            try:
+                await session.rollback()
+            except Exception as rollback_error:
+                logger.warning(f"Rollback failed, replacing session: {rollback_error}")
+                reusable = False
+        finally:
+            session.expunge_all()
+        result = TenantJobResult(
+            tenant_id=access_context.tenant_id,
+            duration=self._clock() - start,
+            error=error,
+        )
+        return result, reusable
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_ALGORITHMS = ("HS256", "RS256", "ES256")
+
+
+class TokenVerificationError(ValueError):
+    """Raised when a token fails signature or claim verification."""
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _b64int(segment: str) -> int:
+    return int.from_bytes(_b64decode(segment), "big")
+
+
+@dataclass(frozen=True)
+class JsonWebKey:
+    """A JWK parsed once into a key object ready for verification."""
+
+    kid: str | None
+    alg: str
+    key: Any
+
+    @classmethod
+    def from_jwk(cls, jwk: Mapping[str, Any]) -> "JsonWebKey":
+        kty = jwk.get("kty")
+        if kty == "oct":
+            return cls(
+                kid=jwk.get("kid"),
+                alg=jwk.get("alg", "HS256"),
+                key=_b64decode(jwk["k"]),
+            )
+        if kty == "RSA":
+            rsa = crypto_primitives().rsa
+            numbers = rsa.RSAPublicNumbers(_b64int(jwk["e"]), _b64int(jwk["n"]))
+            return cls(
+                kid=jwk.get("kid"),
+                alg=jwk.get("alg", "RS256"),
+                key=numbers.public_key(),
+            )
+        if kty == "EC":
+            ec = crypto_primitives().ec
+            if jwk.get("crv", "P-256") != "P-256":
+                raise ValueError(f"Unsupported EC curve: {jwk.get('crv')}")
+            numbers = ec.EllipticCurvePublicNumbers(
+                _b64int(jwk["x"]), _b64int(jwk["y"]), ec.SECP256R1()
+            )
+            return cls(
+                kid=jwk.get("kid"),
+                alg=jwk.get("alg", "ES256"),
+                key=numbers.public_key(),
+            )
+        raise ValueError(f"Unsupported key type: {kty!r}")
+
+    def verify(self, signing_input: bytes, signature: bytes) -> bool:
+        if self.alg == "HS256":
+            expected = hmac.new(self.key, signing_input, hashlib.sha256).digest()
+            return hmac.compare_digest(expected, signature)
+
+        crypto = crypto_primitives()
+        try:
+            if self.alg == "RS256":
+                self.key.verify(
+                    signature,
+                    signing_input,
+                    crypto.padding.PKCS1v15(),
+                    crypto.hashes.SHA256(),
+                )
+            elif self.alg == "ES256":
+                if len(signature) != 64:
+                    return False
+                der = crypto.encode_dss_signature(
+                    int.from_bytes(signature[:32], "big"),
+                    int.from_bytes(signature[32:], "big"),
+                )
+                self.key.verify(
+                    der, signing_input, crypto.ec.ECDSA(crypto.hashes.SHA256())
+                )
+            else:
+                return False
+        except crypto.InvalidSignature:
+            return False
+        return True
+
+
+class _Crypto:
+    def __init__(self) -> None:
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+        from cryptography.hazmat.primitives.asymmetric.utils import (
+            decode_dss_signature,
+            encode_dss_signature,
+        )
+
+        self.InvalidSignature = InvalidSignature
+        self.hashes = hashes
+        self.ec = ec
+        self.padding = padding
+        self.rsa = rsa
+        self.serialization = serialization
+        self.decode_dss_signature = decode_dss_signature
+        self.encode_dss_signature = encode_dss_signature
+
+
+_CRYPTO: _Crypto | None = None
+
+
+def crypto_primitives() -> _Crypto:
+    """Return the lazily imported `cryptography` primitives used for RS256/ES256."""
+    global _CRYPTO
+    if _CRYPTO is None:
+        try:
+            _CRYPTO = _Crypto()
+        except ImportError as e:
+            raise RuntimeError(
+                "RS256/ES256 keys require the 'cryptography' package; "
+                "install tenauth[jwks]"
+            ) from e
+    return _CRYPTO
+
+
+class KeyStore:
+    """Verification keys indexed by `kid`, with a cache of verified tokens.
+
+    Keys are parsed once when a JWKS is loaded. Calling `load` (or `reload`
+    for file-backed stores) swaps the key index atomically, so keys can be
+    rotated without restarting. Tokens that verify successfully are
+    remembered until their `exp`, so hot tokens are verified once; the
+    `cache_size` most recently used are kept. Tokens without `exp` (with
+    `require_exp=False`) are verified again every `cache_ttl` seconds.
+    `exp` and `nbf` allow for `leeway` seconds of clock skew.
+    """
+
+    def __init__(
+        self,
+        jwks: Mapping[str, Any] | None = None,
+        *,
+        algorithms: Iterable[str] = SUPPORTED_ALGORITHMS,
+        issuer: str | None = None,
+        audience: str | None = None,
+        leeway: float = 0.0,
+        require_exp: bool = True,
+        cache_size: int = 4096,
+        cache_ttl: float = 300.0,
+        refresh_interval: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.algorithms = frozenset(algorithms)
+        unsupported = self.algorithms - set(SUPPORTED_ALGORITHMS)
+        if unsupported:
+            raise ValueError(f"Unsupported algorithms: {sorted(unsupported)}")
+        self.issuer = issuer
+        self.audience = audience
+        self.leeway = leeway
+        self.require_exp = require_exp
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._path: str | None = None
+        self._mtime: float | None = None
+        self._last_check = 0.0
+        self._keys: dict[str | None, JsonWebKey] = {}
+        self._verified: OrderedDict[str, float] = OrderedDict()
+        self._lock = threading.Lock()
+        if jwks is not None:
+            self.load(jwks)
+
+    @classmethod
+    def from_file(cls, path: str | os.PathLike[str], **kwargs: Any) -> "KeyStore":
+        """Load a JWKS document from `path`; `reload()` picks up changes."""
+        store = cls(**kwargs)
+        store._path = os.fspath(path)
+        store.reload(force=True)
+        return store
+
+    @property
+    def kids(self) -> list[str | None]:
+        return list(self._keys)
+
+    def load(self, jwks: Mapping[str, Any]) -> None:
+        """Replace the key index with the keys of a JWKS document."""
+        keys: dict[str | None, JsonWebKey] = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("use", "sig") != "sig":
+                continue
+            key = JsonWebKey.from_jwk(jwk)
+            if key.alg in self.algorithms:
+                keys[key.kid] = key
+        with self._lock:
+            self._keys = keys
+            self._verified.clear()
+
+    def reload(self, *, force: bool = False) -> bool:
+        """Re-read the backing JWKS file if it changed; return True if reloaded."""
+        if self._path is None:
+            return False
+        self._last_check = self._clock()
+        mtime = os.stat(self._path).st_mtime
+        if not force and mtime == self._mtime:
+            return False
+        with open(self._path, encoding="utf-8") as fh:
+            self.load(json.load(fh))
+        self._mtime = mtime
+        logger.info(f"Loaded {len(self._keys)} verification keys from {self._path}")
+        return True
+
+    def verify(self, token: str) -> None:
+        """Verify signature and registered claims, raising TokenVerificationError."""
+        now = self._clock()
+        if (
+            self.refresh_interval is not None
+            and now - self._last_check >= self.refresh_interval
+        ):
+            self.reload()
+
+        deadline = self._verified.get(token)
+        if deadline is not None:
+            if deadline > now:
+                with self._lock:
+                    if token in self._verified:
+                        self._verified.move_to_end(token)
+                return
+            # the deadline may be `cache_ttl` rather than `exp`: verify afresh
+            with self._lock:
+                self._verified.pop(token, None)
+
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            header = json.loads(_b64decode(header_segment))
+            signature = _b64decode(signature_segment)
+        except Exception as e:
+            raise TokenVerificationError(f"Malformed JWT: {e}") from e
+
+        alg = header.get("alg")
+        if alg not in self.algorithms:
+            raise TokenVerificationError(f"Algorithm not allowed: {alg!r}")
+        key = self._find_key(header.get("kid"))
+        if key.alg != alg:
+            raise TokenVerificationError(f"Key {key.kid!r} does not use {alg}")
+        signing_input = f"{header_segment}.{payload_segment}".encode("ascii")
+        if not key.verify(signing_input, signature):
+            raise TokenVerificationError("Signature verification failed")
+
+        try:
+            payload = json.loads(_b64decode(payload_segment))
+        except Exception as e:
+            raise TokenVerificationError(f"Malformed JWT payload: {e}") from e
+        self._remember(token, self._check_claims(payload, now))
+
+    def _find_key(self, kid: str | None) -> JsonWebKey:
+        keys = self._keys
+        key = keys.get(kid)
+        if key is None and kid is None and len(keys) == 1:
+            key = next(iter(keys.values()))
+        if key is None and self._path is not None:
+            # unknown kid: the keys may have been rotated since the last check
+            self.reload()
+            key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError(f"Unknown signing key: {kid!r}")
+        return key
+
+    def _check_claims(self, payload: Mapping[str, Any], now: float) -> float:
+        exp = payload.get("exp")
+        if exp is None:
+            if self.require_exp:
+                raise TokenVerificationError("Missing exp claim")
+            deadline = now + self.cache_ttl
+        else:
+            deadline = float(exp) + self.leeway
+            if deadline <= now:
+                raise TokenVerificationError("Token expired")
+        nbf = payload.get("nbf")
+        if nbf is not None and float(nbf) - self.leeway > now:
+            raise TokenVerificationError("Token is not valid yet")
+        if self.issuer is not None and payload.get("iss") != self.issuer:
+            raise TokenVerificationError(f"Invalid issuer: {payload.get('iss')!r}")
+        if self.audience is not None:
+            aud = payload.get("aud")
+            audiences = aud if isinstance(aud, list) else [aud]
+            if self.audience not in audiences:
+                raise TokenVerificationError(f"Invalid audience: {aud!r}")
+        return deadline
+
+    def _remember(self, token: str, deadline: float) -> None:
+        with self._lock:
+            self._verified[token] = deadline
+            while len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import HTTPException
+from starlette import status
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from . import instrumentation
+from .context import bind_access_context
+from .schemas import AccessContext, AuthContext
+from .websocket import resolve_websocket_auth_context
+
+AUTH_SCOPE_KEY = "tenauth.auth_context"
+ACCESS_SCOPE_KEY = "tenauth.access_context"
+ERROR_SCOPE_KEY = "tenauth.auth_error"
+
+
+class AuthContextMiddleware:
+    """Resolve the bearer token once per request and store it in the ASGI scope.
+
+    HTTP requests read the `Authorization` header; websocket handshakes use
+    the same token sources as `websocket_auth_context`. The resulting
+    `AuthContext` and `AccessContext` are read by `get_scope_auth_context`
+    and `get_scope_access_context`, and the access context is bound with
+    `bind_access_context` while the request is handled. With
+    `required=True`, unauthenticated requests are rejected here (401, or
+    close code 1008 for websockets), except for paths listed in
+    `exempt_paths`.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        required: bool = False,
+        exempt_paths: Iterable[str] = (),
+    ) -> None:
+        self.app = app
+        self.required = required
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        if instrumentation.hooks:
+            with instrumentation.measure(
+                instrumentation.AUTH_PARSE,
+                cache=AuthContext.token_cache,
+                middleware=True,
+            ):
+                auth, error = _resolve_scope(scope, receive, send)
+        else:
+            auth, error = _resolve_scope(scope, receive, send)
+
+        access = (
+            AccessContext(tenant_id=auth.tid, user_id=auth.sub)
+            if auth is not None
+            else None
+        )
+        scope[AUTH_SCOPE_KEY] = auth
+        scope[ACCESS_SCOPE_KEY] = access
+        scope[ERROR_SCOPE_KEY] = error
+
+        if access is None:
+            if self.required and scope["path"] not in self.exempt_paths:
+                await _reject(scope, send, error)
+                return
+            await self.app(scope, receive, send)
+            return
+        with bind_access_context(access):
+            await self.app(scope, receive, send)
+
+
+def _resolve_scope(
+    scope: Scope, receive: Receive, send: Send
+) -> tuple[AuthContext | None, str | None]:
+    if scope["type"] == "websocket":
+        try:
+            return resolve_websocket_auth_context(WebSocket(scope, receive, send)), None
+        except WebSocketDisconnect:
+            return None, "Invalid token"
+
+    authorization = None
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    if not authorization:
+        return None, "Missing Authorization header"
+    scheme, _, token = authorization.partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        return None, "Invalid authorization scheme"
+    try:
+        return AuthContext.from_token(token), None
+    except HTTPException as exc:
+        return None, exc.detail
+
+
+async def _reject(scope: Scope, send: Send, detail: str | None) -> None:
+    if scope["type"] == "websocket":
+        await send({"type": "websocket.close", "code": status.WS_1008_POLICY_VIOLATION})
+        return
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status.HTTP_401_UNAUTHORIZED,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"www-authenticate", b"Bearer"),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def _scope_value(connection: HTTPConnection, key: str) -> Any:
+    scope = connection.scope
+    if key not in scope:
+        raise RuntimeError("AuthContextMiddleware is not installed")
+    value = scope[key]
+    if value is None:
+        if scope["type"] == "websocket":
+            raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail=scope[ERROR_SCOPE_KEY]
+        )
+    return value
+
+
+async def get_scope_auth_context(connection: HTTPConnection) -> AuthContext:
+    """Return the AuthContext resolved by AuthContextMiddleware, else raise 401."""
+    return _scope_value(connection, AUTH_SCOPE_KEY)
+
+
+async def get_scope_access_context(connection: HTTPConnection) -> AccessContext:
+    """Return the AccessContext resolved by AuthContextMiddleware, else raise 401."""
+    return _scope_value(connection, ACCESS_SCOPE_KEY)
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Protocol
+from uuid import UUID
+
+from .jwks import TokenVerificationError
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    from .schemas import AuthContext
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_KINDS = ("jti", "sub", "tid")
+
+
+@dataclass(frozen=True, slots=True)
+class RevocationChange:
+    """One revocation (or its withdrawal) for a token id, subject or tenant.
+
+    A subject or tenant revocation without `revoked_at` rejects all of its
+    tokens. Subject and tenant values are stored in canonical UUID form.
+    """
+
+    kind: str
+    value: str
+    revoked_at: float = math.inf
+    expires_at: float | None = None
+    restored: bool = False
+
+    def __post_init__(self) -> None:
+        if self.kind != "jti":
+            object.__setattr__(self, "value", _canonical(self.value))
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any]) -> "RevocationChange":
+        kind = record["kind"]
+        if kind not in REVOCATION_KINDS:
+            raise ValueError(f"Unknown revocation kind: {kind!r}")
+        revoked_at = record.get("revoked_at")
+        expires_at = record.get("expires_at")
+        return cls(
+            kind=kind,
+            value=str(record["value"]),
+            revoked_at=float(revoked_at) if revoked_at is not None else math.inf,
+            expires_at=float(expires_at) if expires_at is not None else None,
+            restored=bool(record.get("restored", False)),
+        )
+
+
+def _canonical(value: object) -> str:
+    try:
+        return str(UUID(str(value)))
+    except ValueError:
+        return str(value)
+
+
+class RevocationSource(Protocol):
+    async def changes(self, cursor: Any) -> tuple[list[RevocationChange], Any, bool]:
+        """Return changes after `cursor`, the new cursor, and whether to rebuild."""
+        ...
+
+
+class FileRevocationSource:
+    """Append-only JSON lines file of revocation records.
+
+    Each line holds `kind` (`jti`, `sub` or `tid`), `value` and optionally
+    `revoked_at`, `expires_at` and `restored`. Only lines appended since the
+    last sync are read; a truncated or replaced file triggers a full rebuild.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+
+    async def changes(self, cursor: Any) -> tuple[list[RevocationChange], Any, bool]:
+        return await asyncio.to_thread(self._read, cursor)
+
+    def _read(self, cursor: Any) -> tuple[list[RevocationChange], Any, bool]:
+        stat = os.stat(self.path)
+        inode, offset = cursor if cursor is not None else (None, 0)
+        reset = inode != stat.st_ino or offset > stat.st_size
+        if reset:
+            offset = 0
+        changes = []
+        with open(self.path, "rb") as fh:
+            fh.seek(offset)
+            for line in fh:
+                if not line.endswith(b"\n"):
+                    break  # partially written record; read it next time
+                offset += len(line)
+                if line.strip():
+                    changes.append(RevocationChange.from_record(json.loads(line)))
+        return changes, (stat.st_ino, offset), reset and cursor is not None
+
+
+class TableRevocationSource:
+    """Revocation records read incrementally from a database table.
+
+    The table needs an increasing integer `id` plus `kind`, `value`,
+    `revoked_at`, `expires_at` and `restored` columns; rows with an id above
+    the last one seen are fetched in batches.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        table: str = "token_revocations",
+        batch_size: int = 5000,
+    ) -> None:
+        if not table.replace("_", "").replace(".", "").isalnum():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.engine = engine
+        self.table = table
+        self.batch_size = batch_size
+
+    async def changes(self, cursor: Any) -> tuple[list[RevocationChange], Any, bool]:
+        from sqlalchemy import text
+
+        statement = text(
+            "SELECT id, kind, value, revoked_at, expires_at, restored "
+            f"FROM {self.table} WHERE id > :cursor ORDER BY id LIMIT :limit"
+        )
+        last_id = cursor or 0
+        async with self.engine.connect() as conn:
+            rows = (
+                (
+                    await conn.execute(
+                        statement, {"cursor": last_id, "limit": self.batch_size}
+                    )
+                )
+                .mappings()
+                .all()
+            )
+        changes = [RevocationChange.from_record(_timestamps(row)) for row in rows]
+        if rows:
+            last_id = rows[-1]["id"]
+        return changes, last_id, False
+
+
+def _timestamps(row: Mapping[str, Any]) -> dict[str, Any]:
+    record = dict(row)
+    for key in ("revoked_at", "expires_at"):
+        value = record.get(key)
+        if hasattr(value, "timestamp"):
+            record[key] = value.timestamp()
+    return record
+
+
+@dataclass(frozen=True)
+class RevocationStats:
+    """Snapshot of a `RevocationIndex`."""
+
+    jtis: int
+    subjects: int
+    tenants: int
+    checks: int
+    revoked: int
+    syncs: int
+    sync_errors: int
+    last_sync: float | None
+    sync_lag: float | None
+
+    @property
+    def size(self) -> int:
+        return self.jtis + self.subjects + self.tenants
+
+
+class RevocationIndex:
+    """In-memory revocation index checked while tokens are parsed.
+
+    Token ids (`jti`) are revoked outright. Subject and tenant revocations
+    reject tokens issued at or before `revoked_at`, so tokens issued after
+    the revocation stay valid. Lookups are dict probes. Entries are dropped
+    once `expires_at` has passed.
+    """
+
+    def __init__(
+        self,
+        source: RevocationSource | None = None,
+        *,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.source = source
+        self._clock = clock
+        self._entries: dict[str, dict[str, tuple[float, float | None]]] = {
+            kind: {} for kind in REVOCATION_KINDS
+        }
+        self._lock = threading.Lock()
+        self._cursor: Any = None
+        self._task: asyncio.Task[None] | None = None
+        self.checks = 0
+        self.revoked = 0
+        self.syncs = 0
+        self.sync_errors = 0
+        self.last_sync: float | None = None
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def revoke(
+        self,
+        *,
+        jti: str | None = None,
+        sub: object | None = None,
+        tid: object | None = None,
+        revoked_at: float | None = None,
+        expires_at: float | None = None,
+    ) -> None:
+        """Revoke a token id, or all tokens of a subject or tenant issued until now."""
+        revoked_at = self._clock() if revoked_at is None else revoked_at
+        changes = [
+            RevocationChange(kind, str(value), revoked_at, expires_at)
+            for kind, value in (("jti", jti), ("sub", sub), ("tid", tid))
+            if value is not None
+        ]
+        if not changes:
+            raise ValueError("revoke() needs a jti, sub or tid")
+        self.apply(changes)
+
+    def apply(self, changes: Iterable[RevocationChange]) -> None:
+        """Apply a batch of changes, e.g. a delta pulled from a source."""
+        with self._lock:
+            for change in changes:
+                entries = self._entries[change.kind]
+                if change.restored:
+                    entries.pop(change.value, None)
+                else:
+                    entries[change.value] = (change.revoked_at, change.expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+    def is_revoked(self, ctx: AuthContext) -> bool:
+        self.checks += 1
+        jti = ctx.jti
+        if jti is not None and jti in self._entries["jti"]:
+            self.revoked += 1
+            return True
+        for kind, value in (("sub", ctx.sub), ("tid", ctx.tid)):
+            entry = self._entries[kind].get(str(value))
+            if entry is not None and (ctx.iat is None or ctx.iat <= entry[0]):
+                self.revoked += 1
+                return True
+        return False
+
+    def check(self, ctx: AuthContext) -> None:
+        """Raise TokenVerificationError when `ctx` has been revoked."""
+        if self.is_revoked(ctx):
+            raise TokenVerificationError("Token has been revoked")
+
+    async def sync(self) -> int:
+        """Pull changes since the last sync from `source`; return how many applied."""
+        if self.source is None:
+            raise RuntimeError("RevocationIndex has no source to sync from")
+        try:
+            changes, cursor, reset = await self.source.changes(self._cursor)
+        except Exception:
+            self.sync_errors += 1
+            raise
+        if reset:
+            logger.info("Revocation source was replaced; rebuilding the index")
+            self.clear()
+        self.apply(changes)
+        self._cursor = cursor
+        self.prune()
+        self.syncs += 1
+        self.last_sync = self._clock()
+        return len(changes)
+
+    def prune(self) -> int:
+        """Drop entries whose `expires_at` has passed; return how many were dropped."""
+        now = self._clock()
+        dropped = 0
+        with self._lock:
+            for entries in self._entries.values():
+                expired = [
+                    key
+                    for key, (_, expires_at) in entries.items()
+                    if expires_at is not None and expires_at <= now
+                ]
+                for key in expired:
+                    del entries[key]
+                dropped += len(expired)
+        return dropped
+
+    def start(self, interval: float = 5.0) -> asyncio.Task[None]:
+        """Sync from `source` every `interval` seconds in a background task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(interval))
+        return self._task
+
+    async def close(self) -> None:
+        """Stop the background sync task."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def stats(self) -> RevocationStats:
+        now = self._clock()
+        return RevocationStats(
+            jtis=len(self._entries["jti"]),
+            subjects=len(self._entries["sub"]),
+            tenants=len(self._entries["tid"]),
+            checks=self.checks,
+            revoked=self.revoked,
+            syncs=self.syncs,
+            sync_errors=self.sync_errors,
+            last_sync=self.last_sync,
+            sync_lag=now - self.last_sync if self.last_sync is not None else None,
+        )
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Revocation sync failed: {e}")
+            await asyncio.sleep(interval)
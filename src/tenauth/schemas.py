@@ -1,16 +1,33 @@
 from __future__ import annotations
 
 import base64
+import copy
 import json
 import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, ClassVar
 from uuid import UUID
+from weakref import WeakValueDictionary
 
-from fastapi import HTTPException
-from pydantic import BaseModel, Field
-from sqlmodel.ext.asyncio.session import AsyncSession
+from pydantic import BaseModel, Field, PrivateAttr
+
+from .cache import TokenCache
+from .jwks import KeyStore, TokenVerificationError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+if TYPE_CHECKING:
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from .revocation import RevocationIndex
 
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 class AccessContext(BaseModel):
     """Simple tenant/user context bound to a database session."""
@@ -21,6 +38,49 @@ class AccessContext(BaseModel):
     @classmethod
     def from_session(cls, session: AsyncSession) -> "AccessContext":
         """Construct an AccessContext from `session.info` metadata."""
+        compact = CompactAccessContext.from_session(session)
+        return cls.model_construct(tenant_id=compact.tenant_id, user_id=compact.user_id)
+
+    def compact(self) -> "CompactAccessContext":
+        return CompactAccessContext(tenant_id=self.tenant_id, user_id=self.user_id)
+
+
+_tenant_ids: WeakValueDictionary[UUID, UUID] = WeakValueDictionary()
+
+
+def _intern_tenant_id(tenant_id: UUID | str) -> UUID:
+    if not isinstance(tenant_id, UUID):
+        tenant_id = UUID(str(tenant_id))
+    return _tenant_ids.setdefault(tenant_id, tenant_id)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactAccessContext:
+    """Hashable tenant/user pair for long-lived registries and cache keys.
+
+    Tenant ids are interned, so many contexts of the same tenant share one
+    UUID object. Use `to_model()` to get an `AccessContext` back.
+    """
+
+    tenant_id: UUID
+    user_id: UUID
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "tenant_id", _intern_tenant_id(self.tenant_id))
+        if not isinstance(self.user_id, UUID):
+            object.__setattr__(self, "user_id", UUID(str(self.user_id)))
+
+    @classmethod
+    def from_context(
+        cls, access_context: "AccessContext | CompactAccessContext"
+    ) -> "CompactAccessContext":
+        if isinstance(access_context, cls):
+            return access_context
+        return cls(tenant_id=access_context.tenant_id, user_id=access_context.user_id)
+
+    @classmethod
+    def from_session(cls, session: AsyncSession) -> "CompactAccessContext":
+        """Construct a CompactAccessContext from `session.info` metadata."""
         try:
             tenant_id = session.info.get("tenant_id")  # type: ignore[assignment]
             user_id = session.info.get("user_id")  # type: ignore[assignment]
@@ -32,6 +92,14 @@ class AccessContext(BaseModel):
         except Exception as e:
             raise ValueError(f"Failed to get tenant_id and user_id from session: {e}")
 
+    def to_model(self) -> AccessContext:
+        return AccessContext.model_construct(
+            tenant_id=self.tenant_id, user_id=self.user_id
+        )
+
+
+AnyAccessContext = AccessContext | CompactAccessContext
+
 
 class AuthContext(BaseModel):
     """
@@ -43,7 +111,7 @@ class AuthContext(BaseModel):
     - role: role string (owner|admin|editor|viewer)
     - scopes: list[str] fine-grained permissions
     - plan: optional plan/entitlements string or dict
-    - iat, exp, iss, aud: standard JWT fields (kept as-is)
+    - iat, exp, iss, aud, jti: standard JWT fields (kept as-is)
     """
 
     sub: UUID = Field(..., description="User ID")
@@ -55,38 +123,151 @@ class AuthContext(BaseModel):
     exp: int | None = None
     iss: str | None = None
     aud: str | list[str] | None = None
+    jti: str | None = None
+
+    # values derived from this token once and reused (e.g. compiled scope masks)
+    _derived: dict = PrivateAttr(default_factory=dict)
+
+    token_cache: ClassVar[TokenCache | None] = None
+    fast_parsing: ClassVar[bool] = False
+    key_store: ClassVar[KeyStore | None] = None
+    revocation_index: ClassVar[RevocationIndex | None] = None
 
     @classmethod
-    def from_token(cls, token: str) -> "AuthContext":
-        """Parse JWT (without signature verification) into an AuthContext."""
-        try:
-            parts = token.split(".")
-            if len(parts) < 2:
-                raise ValueError("Malformed JWT")
+    def from_token(
+        cls,
+        token: str,
+        *,
+        cache: TokenCache | None = None,
+        fast: bool | None = None,
+        key_store: KeyStore | None = None,
+        revocation_index: RevocationIndex | None = None,
+    ) -> "AuthContext":
+        """Parse JWT into an AuthContext.
 
-            payload_bytes = base64.urlsafe_b64decode(
-                parts[1] + "=" * (-len(parts[1]) % 4)
-            )
-            payload = json.loads(payload_bytes.decode("utf-8"))
-
-            sub = UUID(payload.get("sub")) if payload.get("sub") else None
-            tid = UUID(payload.get("tid")) if payload.get("tid") else None
-            if not sub or not tid:
-                raise ValueError("Missing sub/tid in token")
-
-            scopes = payload.get("scopes")
-            if isinstance(scopes, str):
-                scopes = [s.strip() for s in scopes.split(" ") if s.strip()]
-
-            data = {k: payload.get(k) for k in ("role", "iat", "exp", "iss", "aud")}
-            data.update(
-                sub=sub,
-                tid=tid,
-                scopes=scopes,
-                plan=payload.get("plan") or payload.get("entitlements"),
+        The signature is only verified when `key_store` is given or
+        `AuthContext.key_store` is configured. Revoked tokens are rejected
+        when `revocation_index` or `AuthContext.revocation_index` is set.
+        When `cache` is given, or `AuthContext.token_cache` is configured,
+        repeated tokens are served from the cache instead of being re-parsed.
+        `fast` (default: `AuthContext.fast_parsing`) selects the single-pass
+        parser, which uses `orjson` when it is installed.
+        """
+        try:
+            return cls._resolve_token(
+                token,
+                cache=cache,
+                fast=fast,
+                key_store=key_store,
+                revocation_index=revocation_index,
             )
-            return cls(**data)
-
+        except TokenVerificationError as e:
+            logger.warning(f"Failed to verify JWT: {e}")
+            raise _invalid_token()
         except Exception as e:
             logger.warning(f"Failed to parse JWT: {e}")
-            raise HTTPException(status_code=401, detail="Invalid token")
+            raise _invalid_token()
+
+    @classmethod
+    def _resolve_token(
+        cls,
+        token: str,
+        *,
+        cache: TokenCache | None = None,
+        fast: bool | None = None,
+        key_store: KeyStore | None = None,
+        revocation_index: RevocationIndex | None = None,
+    ) -> "AuthContext":
+        """`from_token` without logging; failures propagate as raised."""
+        key_store = key_store if key_store is not None else cls.key_store
+        if key_store is not None:
+            key_store.verify(token)
+        if revocation_index is None:
+            revocation_index = cls.revocation_index
+
+        cache = cache if cache is not None else cls.token_cache
+        ctx = cache.get(token) if cache is not None else None
+        if ctx is None:
+            if fast if fast is not None else cls.fast_parsing:
+                ctx = cls._parse_token_fast(token)
+            else:
+                ctx = cls._parse_token(token)
+            if cache is not None:
+                cache.put(token, ctx)
+
+        # checked on cache hits too, so revocations apply to cached tokens
+        if revocation_index is not None:
+            revocation_index.check(ctx)
+        return ctx
+
+    @classmethod
+    def _parse_token(cls, token: str) -> "AuthContext":
+        parts = token.split(".")
+        if len(parts) < 2:
+            raise ValueError("Malformed JWT")
+
+        payload_bytes = base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4))
+        payload = json.loads(payload_bytes.decode("utf-8"))
+
+        sub = UUID(payload.get("sub")) if payload.get("sub") else None
+        tid = UUID(payload.get("tid")) if payload.get("tid") else None
+        if not sub or not tid:
+            raise ValueError("Missing sub/tid in token")
+
+        scopes = payload.get("scopes")
+        if isinstance(scopes, str):
+            scopes = [s.strip() for s in scopes.split(" ") if s.strip()]
+
+        data = {k: payload.get(k) for k in ("role", "iat", "exp", "iss", "aud", "jti")}
+        data.update(
+            sub=sub,
+            tid=tid,
+            scopes=scopes,
+            plan=payload.get("plan") or payload.get("entitlements"),
+        )
+        return cls(**data)
+
+    @classmethod
+    def _parse_token_fast(cls, token: str) -> "AuthContext":
+        start = token.index(".") + 1
+        end = token.find(".", start)
+        segment = token[start:end] if end != -1 else token[start:]
+        payload = _json_loads(
+            base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+        )
+        return cls._from_claims(payload)
+
+    @classmethod
+    def _from_claims(cls, payload: dict) -> "AuthContext":
+        """Validate a decoded claim set; `payload` is normalised in place."""
+        if not payload.get("sub") or not payload.get("tid"):
+            raise ValueError("Missing sub/tid in token")
+
+        scopes = payload.get("scopes")
+        if isinstance(scopes, str):
+            payload["scopes"] = [s.strip() for s in scopes.split(" ") if s.strip()]
+        payload["plan"] = payload.get("plan") or payload.get("entitlements")
+        return cls.model_validate(payload)
+
+    def detached(self) -> "AuthContext":
+        """Copy whose `scopes`, `plan` and `aud` are not shared with this one.
+
+        Caches hand these out, so in-place edits stay with one request. The
+        derived values (e.g. compiled scope masks) are still shared; they
+        record the scopes they were computed from.
+        """
+        update: dict = {}
+        if self.scopes is not None:
+            update["scopes"] = list(self.scopes)
+        if isinstance(self.plan, dict):
+            update["plan"] = copy.deepcopy(self.plan)
+        if isinstance(self.aud, list):
+            update["aud"] = list(self.aud)
+        return self.model_copy(update=update)
+
+
+def _invalid_token() -> Exception:
+    # imported here so workers that only parse tokens don't load FastAPI
+    from fastapi import HTTPException
+
+    return HTTPException(status_code=401, detail="Invalid token")
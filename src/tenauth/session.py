@@ -1,22 +1,289 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator, Callable
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
-from typing import AsyncContextManager
+from typing import Any, AsyncContextManager, TypeVar
 from uuid import UUID
 
-from sqlalchemy import text
+from sqlalchemy import Connection, Engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from .schemas import AccessContext
+from . import instrumentation
+from .context import bind_access_context, get_current_access_context
+from .schemas import AnyAccessContext
 
 SessionFactory = Callable[[], AsyncContextManager[AsyncSession]]
 
+T = TypeVar("T")
+
+_APPLY_AND_READ_BACK = text(
+    "SELECT set_config('app.tenant_id', :tid, false) AS tenant_id, "
+    "set_config('app.user_id', :uid, false) AS user_id"
+)
+_APPLY_LOCAL_AND_READ_BACK = text(
+    "SELECT set_config('app.tenant_id', :tid, true) AS tenant_id, "
+    "set_config('app.user_id', :uid, true) AS user_id"
+)
+
+
+# connection.info keys: the context committed on the connection, and the one
+# applied by the connection's open transaction (reverted if it rolls back)
+_BOUND_KEY = "tenauth.access_context"
+_PENDING_KEY = "tenauth.pending_access_context"
+# recorded instead of a context when session-scoped GUCs are changed outside
+# the reuse binding: set to a context that is not tracked (the connection is
+# reset when it goes back to the pool), or cleared by RESET
+_UNTRACKED = "untracked"
+_CLEARED = "cleared"
+
+# a NULL value makes set_config behave like RESET; both GUCs in one round trip
+_RESET_ON_RETURN = (
+    "SELECT set_config('app.user_id', NULL, false), "
+    "set_config('app.tenant_id', NULL, false)"
+)
+
+
+def _promote_pending(conn: Connection) -> None:
+    pending = conn.info.pop(_PENDING_KEY, None)
+    if pending is not None:
+        conn.info[_BOUND_KEY] = pending
+
+
+def _drop_pending(conn: Connection) -> None:
+    conn.info.pop(_PENDING_KEY, None)
+
+
+def _reset_on_return(dbapi_connection: Any, record: Any, reset_state: Any) -> None:
+    info = record.info
+    info.pop(_PENDING_KEY, None)
+    if info.get(_BOUND_KEY) != _UNTRACKED or reset_state.terminate_only:
+        return
+    del info[_BOUND_KEY]
+    if instrumentation.hooks:
+        round_trips = 2 if reset_state.transaction_was_reset else 3
+        with instrumentation.measure(
+            instrumentation.SESSION_RESET, round_trips=round_trips, mode="checkin"
+        ):
+            _reset_dbapi_connection(dbapi_connection, reset_state)
+    else:
+        _reset_dbapi_connection(dbapi_connection, reset_state)
+
+
+def _reset_dbapi_connection(dbapi_connection: Any, reset_state: Any) -> None:
+    # runs before the pool's own rollback, which would revert the reset;
+    # if it fails the pool invalidates the connection instead
+    if not reset_state.transaction_was_reset:
+        dbapi_connection.rollback()
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(_RESET_ON_RETURN)
+    finally:
+        cursor.close()
+    dbapi_connection.commit()
+
+
+def _is_tracked(engine: Engine) -> bool:
+    return event.contains(engine, "commit", _promote_pending)
+
+
+def _mark_session_scoped(info: dict, state: str = _UNTRACKED) -> None:
+    """Record that the open transaction changed session-scoped GUCs directly.
+
+    On engines set up with `track_connection_access_context`, a commit makes
+    `state` the connection's recorded binding, so reusing sessions rebind
+    it, and an `_UNTRACKED` connection is reset when it goes back to the
+    pool. A rollback reverts the GUCs and drops the mark. Other engines
+    never read it.
+    """
+    info[_PENDING_KEY] = state
+
+
+async def _mark_session(session: AsyncSession, state: str = _UNTRACKED) -> None:
+    connection = await session.connection()
+    _mark_session_scoped(connection.info, state)
+
+
+def _forget_on_error(context: Any) -> None:
+    try:
+        info = context.connection.info
+    except Exception:
+        # invalidated connections start with an empty info dict on reconnect
+        return
+    info.pop(_PENDING_KEY, None)
+    # the settings on the connection are unknown now; reset them on return
+    info[_BOUND_KEY] = _UNTRACKED
+
+
+def track_connection_access_context(engine: AsyncEngine | Engine) -> None:
+    """Track the access context carried by each pooled connection of `engine`.
+
+    Required for `access_scoped_session_ctx(..., reuse_connection=True)`.
+    Connections whose GUCs were committed by any other session are reset
+    when they go back to the pool. Install it once, before the engine hands
+    out connections.
+    """
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if _is_tracked(sync_engine):
+        return
+    event.listen(sync_engine, "commit", _promote_pending)
+    event.listen(sync_engine, "rollback", _drop_pending)
+    event.listen(sync_engine, "handle_error", _forget_on_error)
+    event.listen(sync_engine.pool, "reset", _reset_on_return)
+
+
+def _access_params(access_context: AnyAccessContext) -> dict[str, str]:
+    return {"tid": str(access_context.tenant_id), "uid": str(access_context.user_id)}
+
+
+def _bind_connection(
+    connection: Connection,
+    statement: Any,
+    params: dict[str, str],
+    access_context: AnyAccessContext,
+    *,
+    verify: bool,
+    mode: str,
+) -> None:
+    if instrumentation.hooks:
+        with instrumentation.measure(
+            instrumentation.SESSION_APPLY, round_trips=1, mode=mode, verified=verify
+        ):
+            _execute_binding(connection, statement, params, access_context, verify)
+    else:
+        _execute_binding(connection, statement, params, access_context, verify)
+
+
+def _execute_binding(
+    connection: Connection,
+    statement: Any,
+    params: dict[str, str],
+    access_context: AnyAccessContext,
+    verify: bool,
+) -> None:
+    db_tenant, db_user = connection.execute(statement, params).one()
+    if verify:
+        _check_access_values(
+            db_tenant,
+            db_user,
+            tenant_id=access_context.tenant_id,
+            user_id=access_context.user_id,
+        )
+
+
+def _reuse_connection_binding(
+    access_context: AnyAccessContext, *, verify: bool
+) -> Callable[[Session, Any, Connection], None]:
+    key = (access_context.tenant_id, access_context.user_id)
+    params = _access_params(access_context)
+
+    def after_begin(session: Session, transaction: Any, connection: Connection) -> None:
+        if not _is_tracked(connection.engine):
+            raise RuntimeError(
+                "reuse_connection requires track_connection_access_context(engine)"
+            )
+        info = connection.info
+        if info.get(_PENDING_KEY, info.get(_BOUND_KEY)) == key:
+            if instrumentation.hooks:
+                instrumentation.emit(
+                    instrumentation.InstrumentationEvent(
+                        name=instrumentation.SESSION_APPLY,
+                        duration=0.0,
+                        attributes={"mode": "reuse_connection", "reused": True},
+                    )
+                )
+            return
+        # recorded before executing: a failed statement rolls back or errors,
+        # and both drop the pending context again
+        info[_PENDING_KEY] = key
+        _bind_connection(
+            connection,
+            _APPLY_AND_READ_BACK,
+            params,
+            access_context,
+            verify=verify,
+            mode="reuse_connection",
+        )
+
+    return after_begin
+
+
+def _transaction_local_binding(
+    access_context: AnyAccessContext, *, verify: bool
+) -> Callable[[Session, Any, Connection], None]:
+    params = _access_params(access_context)
+
+    def after_begin(session: Session, transaction: Any, connection: Connection) -> None:
+        _bind_connection(
+            connection,
+            _APPLY_LOCAL_AND_READ_BACK,
+            params,
+            access_context,
+            verify=verify,
+            mode="transaction_local",
+        )
+
+    return after_begin
+
+
+class _LazySessionBinding:
+    """Apply session-scoped GUCs at the start of every transaction the session begins.
+
+    The first one is the handler's first statement. Each later transaction
+    may run on another pooled connection, and one handed back to the pool
+    has its GUCs reset, so every transaction is bound again.
+    """
+
+    def __init__(self, access_context: AnyAccessContext, *, verify: bool) -> None:
+        self.access_context = access_context
+        self.verify = verify
+        self.applied = False
+        self._params = _access_params(access_context)
+
+    def __call__(
+        self, session: Session, transaction: Any, connection: Connection
+    ) -> None:
+        self.applied = True
+        _mark_session_scoped(connection.info)
+        _bind_connection(
+            connection,
+            _APPLY_AND_READ_BACK,
+            self._params,
+            self.access_context,
+            verify=self.verify,
+            mode="lazy",
+        )
+
+
+def _check_access_values(
+    db_tenant: str | None, db_user: str | None, *, tenant_id: UUID, user_id: UUID
+) -> None:
+    if not db_user or not db_tenant:
+        raise RuntimeError(
+            f"Failed to bind access context: user_id={db_user!r}, tenant_id={db_tenant!r}"
+        )
+    if UUID(db_tenant) != tenant_id:
+        raise RuntimeError(f"Tenant mismatch: {db_tenant} != {tenant_id}")
+    if UUID(db_user) != user_id:
+        raise RuntimeError(f"User mismatch: {db_user} != {user_id}")
+
 
 async def verify_access_context(
     session: AsyncSession, *, tenant_id: UUID, user_id: UUID
 ) -> None:
     """Ensure the session has the expected tenant/user GUCs applied."""
+    if instrumentation.hooks:
+        with instrumentation.measure(instrumentation.SESSION_VERIFY, round_trips=2):
+            await _verify_access_context(session, tenant_id=tenant_id, user_id=user_id)
+    else:
+        await _verify_access_context(session, tenant_id=tenant_id, user_id=user_id)
+
+
+async def _verify_access_context(
+    session: AsyncSession, *, tenant_id: UUID, user_id: UUID
+) -> None:
     res_user = await session.execute(
         text("SELECT current_setting('app.user_id', true)")
     )
@@ -25,23 +292,70 @@ async def verify_access_context(
         text("SELECT current_setting('app.tenant_id', true)")
     )
     db_tenant = res_tenant.scalar()
-    if not db_user or not db_tenant:
-        raise RuntimeError(
-            f"Failed to bind access context: user_id={db_user!r}, tenant_id={db_tenant!r}"
-        )
-    if UUID(db_tenant) != tenant_id:
-        raise RuntimeError(f"Tenant mismatch: {db_tenant} != {tenant_id}")
-    if UUID(db_user) != user_id:
-        raise RuntimeError(f"User mismatch: {db_user} != {user_id}")
+    _check_access_values(db_tenant, db_user, tenant_id=tenant_id, user_id=user_id)
 
 
 async def apply_access_context(
     session: AsyncSession,
     *,
-    access_context: AccessContext,
+    access_context: AnyAccessContext,
     verify: bool = True,
+    single_statement: bool = False,
+) -> None:
+    """Apply tenant/user GUCs to the given session and persist metadata.
+
+    With `single_statement=True` both GUCs are set, and the applied values
+    read back for verification, in one round trip.
+    """
+    await _mark_session(session)
+    if single_statement:
+        if instrumentation.hooks:
+            with instrumentation.measure(
+                instrumentation.SESSION_APPLY,
+                round_trips=1,
+                mode="single_statement",
+                verified=verify,
+            ):
+                await _apply_single_statement(session, access_context, verify)
+        else:
+            await _apply_single_statement(session, access_context, verify)
+    else:
+        if instrumentation.hooks:
+            with instrumentation.measure(
+                instrumentation.SESSION_APPLY, round_trips=2, mode="session"
+            ):
+                await _apply_settings(session, access_context)
+        else:
+            await _apply_settings(session, access_context)
+
+        if verify:
+            await verify_access_context(
+                session,
+                tenant_id=access_context.tenant_id,
+                user_id=access_context.user_id,
+            )
+
+    session.info["tenant_id"] = access_context.tenant_id
+    session.info["user_id"] = access_context.user_id
+
+
+async def _apply_single_statement(
+    session: AsyncSession, access_context: AnyAccessContext, verify: bool
+) -> None:
+    res = await session.execute(_APPLY_AND_READ_BACK, _access_params(access_context))
+    if verify:
+        db_tenant, db_user = res.one()
+        _check_access_values(
+            db_tenant,
+            db_user,
+            tenant_id=access_context.tenant_id,
+            user_id=access_context.user_id,
+        )
+
+
+async def _apply_settings(
+    session: AsyncSession, access_context: AnyAccessContext
 ) -> None:
-    """Apply tenant/user GUCs to the given session and persist metadata."""
     await session.execute(
         text("SELECT set_config('app.tenant_id', :tid, false)"),
         {"tid": str(access_context.tenant_id)},
@@ -51,43 +365,182 @@ async def apply_access_context(
         {"uid": str(access_context.user_id)},
     )
 
-    if verify:
-        await verify_access_context(
-            session,
-            tenant_id=access_context.tenant_id,
-            user_id=access_context.user_id,
-        )
-
-    session.info["tenant_id"] = access_context.tenant_id
-    session.info["user_id"] = access_context.user_id
-
 
 async def reset_access_context(session: AsyncSession) -> None:
     """Reset tenant/user GUCs and clear metadata on session close."""
     try:
-        await session.execute(text("RESET app.user_id"))
-        await session.execute(text("RESET app.tenant_id"))
+        await _mark_session(session, _CLEARED)
+        if instrumentation.hooks:
+            with instrumentation.measure(instrumentation.SESSION_RESET, round_trips=2):
+                await _reset_settings(session)
+        else:
+            await _reset_settings(session)
     except Exception:
-        # best-effort; connection close will drop the settings if this fails
+        # best-effort; tracked engines reset the connection on checkin
         pass
     finally:
         session.info.pop("tenant_id", None)
         session.info.pop("user_id", None)
 
 
+async def _reset_settings(session: AsyncSession) -> None:
+    await session.execute(text("RESET app.user_id"))
+    await session.execute(text("RESET app.tenant_id"))
+
+
+@asynccontextmanager
+async def _bind_on_begin(
+    session: AsyncSession,
+    access_context: AnyAccessContext,
+    listener: Callable[[Session, Any, Connection], None],
+    *,
+    eager: bool = True,
+) -> AsyncIterator[AsyncSession]:
+    """Run `listener` for every transaction the session begins while open.
+
+    Unless `eager`, the first transaction is left to the first statement.
+    """
+    in_transaction = session.in_transaction()
+    event.listen(session.sync_session, "after_begin", listener)
+    try:
+        if in_transaction:
+            await session.run_sync(lambda s: listener(s, None, s.connection()))
+        elif eager:
+            await session.connection()
+        session.info["tenant_id"] = access_context.tenant_id
+        session.info["user_id"] = access_context.user_id
+        yield session
+    finally:
+        event.remove(session.sync_session, "after_begin", listener)
+        session.info.pop("tenant_id", None)
+        session.info.pop("user_id", None)
+
+
+@asynccontextmanager
+async def transaction_local_access_context(
+    session: AsyncSession, access_context: AnyAccessContext, *, verify: bool = True
+) -> AsyncIterator[AsyncSession]:
+    """Bind `access_context` to every transaction `session` begins in the block.
+
+    The GUCs are set with transaction scope, so each commit or rollback
+    ends them, and the next transaction binds them again. Use it to switch
+    a long-lived session between contexts without a reset round trip.
+    """
+    listener = _transaction_local_binding(access_context, verify=verify)
+    async with _bind_on_begin(session, access_context, listener) as bound:
+        yield bound
+
+
 @asynccontextmanager
 async def access_scoped_session_ctx(
     *,
     session_factory: SessionFactory,
-    access_context: AccessContext,
+    access_context: AnyAccessContext,
     verify: bool = True,
+    single_statement: bool = False,
+    reuse_connection: bool = False,
+    transaction_local: bool = False,
+    lazy: bool = False,
 ) -> AsyncIterator[AsyncSession]:
-    """Yield a session with tenant/user GUCs applied for the context lifetime."""
+    """Yield a session with tenant/user GUCs applied for the context lifetime.
+
+    With `reuse_connection=True` the GUCs stay on the pooled connection
+    after the block exits. Every transaction the session begins checks
+    which context its connection carries and only re-applies the GUCs when
+    it differs. Requires `track_connection_access_context(engine)`.
+
+    With `transaction_local=True` the GUCs are set with transaction scope
+    at the start of every transaction the session begins, so nothing has
+    to be reset on exit.
+
+    With `lazy=True` nothing is sent to the database until the handler
+    executes its first statement; if it never does, the reset is skipped
+    as well. Each transaction the session begins is then bound in one
+    statement.
+    """
+    if reuse_connection and transaction_local:
+        raise ValueError("reuse_connection and transaction_local are exclusive")
+
     async with session_factory() as session:
+        if reuse_connection or transaction_local:
+            if reuse_connection:
+                listener = _reuse_connection_binding(access_context, verify=verify)
+            else:
+                listener = _transaction_local_binding(access_context, verify=verify)
+            async with _bind_on_begin(
+                session, access_context, listener, eager=not lazy
+            ):
+                yield session
+            return
+
+        if lazy:
+            binding = _LazySessionBinding(access_context, verify=verify)
+            try:
+                async with _bind_on_begin(
+                    session, access_context, binding, eager=False
+                ):
+                    yield session
+            finally:
+                if binding.applied:
+                    await reset_access_context(session)
+            return
+
         await apply_access_context(
-            session, access_context=access_context, verify=verify
+            session,
+            access_context=access_context,
+            verify=verify,
+            single_statement=single_statement,
         )
         try:
             yield session
         finally:
             await reset_access_context(session)
+
+
+async def gather_scoped(
+    session_factory: SessionFactory,
+    *calls: Callable[[AsyncSession], Awaitable[T]],
+    access_context: AnyAccessContext | None = None,
+    limit: int = 4,
+    verify: bool = True,
+    single_statement: bool = False,
+    reuse_connection: bool = False,
+    transaction_local: bool = False,
+    lazy: bool = False,
+) -> list[T]:
+    """Run `calls` concurrently, each with its own access-scoped session.
+
+    Sessions cannot be shared between concurrent tasks, so every call gets
+    a session from `session_factory` bound to `access_context` (by default
+    the context bound with `bind_access_context`). At most `limit` sessions
+    are open at once. Results are returned in the order of `calls`; if one
+    call fails, the others are cancelled and the error is raised.
+    """
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    if access_context is None:
+        access_context = get_current_access_context()
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(call: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        async with semaphore:
+            with bind_access_context(access_context):
+                async with access_scoped_session_ctx(
+                    session_factory=session_factory,
+                    access_context=access_context,
+                    verify=verify,
+                    single_statement=single_statement,
+                    reuse_connection=reuse_connection,
+                    transaction_local=transaction_local,
+                    lazy=lazy,
+                ) as session:
+                    return await call(session)
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
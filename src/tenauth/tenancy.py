@@ -1,6 +1,18 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
 from uuid import UUID
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
 
 def dsn_with_tenant(dsn: str, tenant_id: UUID) -> str:
     """Return a copy of the DSN with the tenant_id set in the query params."""
@@ -25,3 +37,223 @@ def dsn_with_tenant(dsn: str, tenant_id: UUID) -> str:
             parsed.fragment,
         )
     )
+
+
+@dataclass(frozen=True)
+class TenantPoolStats:
+    """Connection pool usage of one tenant engine."""
+
+    tenant_id: UUID
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    idle_seconds: float
+    leases: int
+
+
+@dataclass(frozen=True)
+class TenantEngineRegistryStats:
+    """Usage of a `TenantEngineRegistry` and its tenant pools."""
+
+    engines: int
+    reserved_connections: int
+    max_connections: int
+    created: int
+    evictions: int
+    pools: list[TenantPoolStats]
+
+
+@dataclass(eq=False)
+class _TenantEngine:
+    engine: AsyncEngine
+    capacity: int
+    last_used: float
+    leases: int = 0
+    retired: bool = False
+
+
+class TenantEngineRegistry:
+    """Lazily created async engines, one per tenant DSN, under a shared budget.
+
+    Each engine reserves `pool_size + max_overflow` connections out of
+    `max_connections`. When a new tenant does not fit, idle engines (no
+    leases and no checked-out connections) are disposed in
+    least-recently-used order. An engine that is removed while leased is
+    disposed when its last lease is released, and keeps its reservation
+    until then.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        pool_size: int = 2,
+        max_overflow: int = 0,
+        max_connections: int = 100,
+        engine_factory: Callable[..., AsyncEngine] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        **engine_kwargs: Any,
+    ) -> None:
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.max_connections = max_connections
+        self.capacity = pool_size + max_overflow
+        if self.capacity > max_connections:
+            raise ValueError("pool_size + max_overflow exceeds max_connections")
+        if engine_factory is None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+
+            engine_factory = create_async_engine
+        self._engine_factory = engine_factory
+        self._engine_kwargs = engine_kwargs
+        self._clock = clock
+        self._engines: OrderedDict[UUID, _TenantEngine] = OrderedDict()
+        # removed from the registry but still leased; disposed on release
+        self._retired: list[_TenantEngine] = []
+        self._lock = asyncio.Lock()
+        self.created = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    def __contains__(self, tenant_id: UUID) -> bool:
+        return tenant_id in self._engines
+
+    @property
+    def reserved_connections(self) -> int:
+        return sum(entry.capacity for entry in self._engines.values()) + sum(
+            entry.capacity for entry in self._retired
+        )
+
+    async def get_engine(self, tenant_id: UUID) -> AsyncEngine:
+        """Return the tenant's engine, creating it (and evicting others) if needed.
+
+        The engine is not leased: once it has no checked-out connections it
+        may be evicted and disposed. Use `lease` to hold on to it.
+        """
+        return (await self._entry(tenant_id)).engine
+
+    @asynccontextmanager
+    async def lease(self, tenant_id: UUID) -> AsyncIterator[AsyncEngine]:
+        """Use the tenant's engine for the duration of the block.
+
+        A leased engine is never evicted; if it is disposed explicitly, the
+        dispose waits until the last lease is released.
+        """
+        entry = await self._entry(tenant_id)
+        entry.leases += 1
+        try:
+            yield entry.engine
+        finally:
+            entry.leases -= 1
+            entry.last_used = self._clock()
+            if entry.retired and entry.leases == 0:
+                self._retired.remove(entry)
+                await entry.engine.dispose()
+
+    async def _entry(self, tenant_id: UUID) -> _TenantEngine:
+        entry = self._engines.get(tenant_id)
+        if entry is None:
+            async with self._lock:
+                entry = self._engines.get(tenant_id)
+                if entry is None:
+                    await self._make_room(self.capacity)
+                    engine = self._engine_factory(
+                        dsn_with_tenant(self.dsn, tenant_id),
+                        pool_size=self.pool_size,
+                        max_overflow=self.max_overflow,
+                        **self._engine_kwargs,
+                    )
+                    entry = _TenantEngine(engine, self.capacity, self._clock())
+                    self._engines[tenant_id] = entry
+                    self.created += 1
+        entry.last_used = self._clock()
+        self._engines.move_to_end(tenant_id)
+        return entry
+
+    async def dispose(self, tenant_id: UUID) -> None:
+        """Forget the engine of one tenant and dispose it once it is not leased."""
+        entry = self._engines.pop(tenant_id, None)
+        if entry is not None:
+            await self._retire(entry)
+
+    async def dispose_all(self) -> None:
+        """Dispose every tenant engine, e.g. on application shutdown.
+
+        Leased engines are disposed when their last lease is released.
+        """
+        entries = list(self._engines.values())
+        self._engines.clear()
+        for entry in entries:
+            await self._retire(entry)
+
+    async def _retire(self, entry: _TenantEngine) -> None:
+        if entry.leases:
+            entry.retired = True
+            self._retired.append(entry)
+        else:
+            await entry.engine.dispose()
+
+    async def evict_idle(self, max_idle_seconds: float) -> int:
+        """Dispose engines without checked-out connections unused for a while."""
+        now = self._clock()
+        stale = [
+            tenant_id
+            for tenant_id, entry in self._engines.items()
+            if now - entry.last_used >= max_idle_seconds and _is_idle(entry)
+        ]
+        for tenant_id in stale:
+            await self.dispose(tenant_id)
+        self.evictions += len(stale)
+        return len(stale)
+
+    def stats(self) -> TenantEngineRegistryStats:
+        now = self._clock()
+        return TenantEngineRegistryStats(
+            engines=len(self._engines),
+            reserved_connections=self.reserved_connections,
+            max_connections=self.max_connections,
+            created=self.created,
+            evictions=self.evictions,
+            pools=[
+                TenantPoolStats(
+                    tenant_id=tenant_id,
+                    size=_pool_metric(entry.engine, "size"),
+                    checked_in=_pool_metric(entry.engine, "checkedin"),
+                    checked_out=_pool_metric(entry.engine, "checkedout"),
+                    overflow=_pool_metric(entry.engine, "overflow"),
+                    idle_seconds=now - entry.last_used,
+                    leases=entry.leases,
+                )
+                for tenant_id, entry in self._engines.items()
+            ],
+        )
+
+    async def _make_room(self, needed: int) -> None:
+        available = self.max_connections - self.reserved_connections
+        if available >= needed:
+            return
+        for tenant_id, entry in list(self._engines.items()):
+            if not _is_idle(entry):
+                continue
+            await self.dispose(tenant_id)
+            self.evictions += 1
+            available += entry.capacity
+            if available >= needed:
+                return
+        raise RuntimeError(
+            f"Connection budget exhausted: {self.reserved_connections} of "
+            f"{self.max_connections} connections reserved by busy tenant pools"
+        )
+
+
+def _pool_metric(engine: AsyncEngine, name: str) -> int:
+    metric = getattr(engine.pool, name, None)
+    return int(metric()) if callable(metric) else 0
+
+
+def _is_idle(entry: _TenantEngine) -> bool:
+    return entry.leases == 0 and _pool_metric(entry.engine, "checkedout") == 0
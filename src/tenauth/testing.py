@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+_SET_CONFIG = re.compile(r"set_config\('([\w.]+)', :(\w+), (?:false|true)\)")
+_CURRENT_SETTING = re.compile(r"current_setting\('([\w.]+)', true\)")
+_RESET = re.compile(r"RESET ([\w.]+)")
+
+
+class FakeResult:
+    def __init__(self, row: tuple) -> None:
+        self._row = row
+
+    def scalar(self) -> Any:
+        return self._row[0] if self._row else None
+
+    def one(self) -> tuple:
+        return self._row
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.info: dict = {}
+
+
+class FakeSession:
+    """Stand-in for AsyncSession that emulates Postgres GUCs and records statements.
+
+    Understands the `set_config`, `current_setting` and `RESET` statements
+    issued by `tenauth.session`. `tamper` overrides the value a GUC ends up
+    with, to simulate a connection that does not apply what was sent.
+
+    It behaves like a session on an engine without
+    `track_connection_access_context`, which sends nothing when connections
+    go back to the pool, so `statements` holds every round trip.
+    """
+
+    def __init__(self, tamper: dict[str, str] | None = None) -> None:
+        self.info: dict = {}
+        self.gucs: dict[str, str] = {}
+        self.statements: list[str] = []
+        self._tamper = tamper or {}
+        self._connection = FakeConnection()
+
+    async def connection(self) -> FakeConnection:
+        return self._connection
+
+    async def execute(self, statement: Any, params: dict | None = None) -> FakeResult:
+        sql = str(statement)
+        self.statements.append(sql)
+        params = params or {}
+        if reset := _RESET.fullmatch(sql):
+            self.gucs.pop(reset.group(1), None)
+            return FakeResult(())
+        row = []
+        for name, param in _SET_CONFIG.findall(sql):
+            self.gucs[name] = self._tamper.get(name, params[param])
+            row.append(self.gucs[name])
+        for name in _CURRENT_SETTING.findall(sql):
+            row.append(self.gucs.get(name))
+        return FakeResult(tuple(row))
@@ -1,12 +1,28 @@
+from __future__ import annotations
+
 import base64
+import hashlib
+import hmac
 import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import Any
 
+from tenauth.jwks import crypto_primitives
 from tenauth.schemas import AuthContext
 
 
-def create_bearer_token(ctx: AuthContext) -> str:
-    """Return a JWT-like Bearer token (no signature) from an AuthContext."""
-    header = {"alg": "none"}
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64json(data: dict) -> str:
+    return _b64(json.dumps(data, separators=(",", ":")).encode())
+
+
+def _claims(ctx: AuthContext) -> dict[str, Any]:
     payload = {
         "sub": str(ctx.sub),
         "tid": str(ctx.tid),
@@ -17,13 +33,149 @@ def create_bearer_token(ctx: AuthContext) -> str:
         "exp": ctx.exp,
         "iss": ctx.iss,
         "aud": ctx.aud,
+        "jti": ctx.jti,
     }
     # remove None values
-    payload = {k: v for k, v in payload.items() if v is not None}
+    return {k: v for k, v in payload.items() if v is not None}
+
 
-    def b64(data: dict) -> str:
-        raw = json.dumps(data, separators=(",", ":")).encode()
-        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+_UNSIGNED_HEADER = _b64json({"alg": "none"})
 
-    token = f"{b64(header)}.{b64(payload)}."
+
+def create_bearer_token(ctx: AuthContext) -> str:
+    """Return a JWT-like Bearer token (no signature) from an AuthContext."""
+    token = f"{_UNSIGNED_HEADER}.{_b64json(_claims(ctx))}."
     return f"Bearer {token}"
+
+
+class TokenMinter:
+    """Mint signed JWTs from AuthContexts for service calls and load tests.
+
+    The header segment is encoded once and HS256 keys are prepared once, so
+    minting costs one payload encoding and one signature. Minted tokens are
+    cached per claim set (subject, tenant, scopes, role, plan) and reused
+    until `refresh_margin` seconds before they expire.
+
+    `key` is the shared secret for HS256, or a `cryptography` private key
+    (or its PEM encoding) for RS256/ES256, which require `tenauth[jwks]`.
+    """
+
+    def __init__(
+        self,
+        key: bytes | str | Any,
+        *,
+        algorithm: str = "HS256",
+        kid: str | None = None,
+        issuer: str | None = None,
+        audience: str | list[str] | None = None,
+        ttl: int = 3600,
+        refresh_margin: float = 60.0,
+        cache_size: int = 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if algorithm not in ("HS256", "RS256", "ES256"):
+            raise ValueError(f"Unsupported algorithm: {algorithm!r}")
+        if ttl <= refresh_margin:
+            raise ValueError("ttl must be longer than refresh_margin")
+        self.algorithm = algorithm
+        self.kid = kid
+        self.issuer = issuer
+        self.audience = audience
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.cache_size = cache_size
+        self._clock = clock
+        header = {"alg": algorithm, "typ": "JWT"}
+        if kid is not None:
+            header["kid"] = kid
+        self._header = _b64json(header)
+        self._sign = self._signer(key)
+        self._tokens: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.minted = 0
+
+    def mint(self, ctx: AuthContext) -> str:
+        """Return a signed token for `ctx`, reusing a cached one when fresh.
+
+        `iat` and `exp` are set by the minter; `iss`/`aud` default to the
+        minter's issuer and audience when `ctx` leaves them unset.
+        """
+        key = claims_key(ctx)
+        now = self._clock()
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None and entry[0] > now:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        token = self._encode(ctx, int(now))
+        with self._lock:
+            self._tokens[key] = (now + self.ttl - self.refresh_margin, token)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.cache_size:
+                self._tokens.popitem(last=False)
+        return token
+
+    def mint_many(self, contexts: Iterable[AuthContext]) -> list[str]:
+        """Mint tokens for `contexts` in order; repeated claim sets are signed once."""
+        return [self.mint(ctx) for ctx in contexts]
+
+    def clear(self) -> None:
+        """Forget all cached tokens."""
+        with self._lock:
+            self._tokens.clear()
+
+    def _encode(self, ctx: AuthContext, now: int) -> str:
+        claims = _claims(ctx)
+        claims["iat"] = now
+        claims["exp"] = now + self.ttl
+        if self.issuer is not None:
+            claims.setdefault("iss", self.issuer)
+        if self.audience is not None:
+            claims.setdefault("aud", self.audience)
+        signing_input = f"{self._header}.{_b64json(claims)}"
+        signature = self._sign(signing_input.encode("ascii"))
+        self.minted += 1
+        return f"{signing_input}.{_b64(signature)}"
+
+    def _signer(self, key: Any) -> Callable[[bytes], bytes]:
+        if self.algorithm == "HS256":
+            if isinstance(key, str):
+                key = key.encode()
+            prepared = hmac.new(key, digestmod=hashlib.sha256)
+
+            def sign_hs256(data: bytes) -> bytes:
+                mac = prepared.copy()
+                mac.update(data)
+                return mac.digest()
+
+            return sign_hs256
+
+        crypto = crypto_primitives()
+        if isinstance(key, (bytes, str)):
+            key = crypto.serialization.load_pem_private_key(
+                key.encode() if isinstance(key, str) else key, password=None
+            )
+        if self.algorithm == "RS256":
+            pkcs1, sha256 = crypto.padding.PKCS1v15(), crypto.hashes.SHA256()
+            return lambda data: key.sign(data, pkcs1, sha256)
+
+        ecdsa = crypto.ec.ECDSA(crypto.hashes.SHA256())
+
+        def sign_es256(data: bytes) -> bytes:
+            r, s = crypto.decode_dss_signature(key.sign(data, ecdsa))
+            return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+        return sign_es256
+
+
+def claims_key(ctx: AuthContext) -> tuple:
+    """Hashable key for every claim of `ctx` that ends up in a minted token."""
+    plan = ctx.plan
+    if isinstance(plan, dict):
+        plan = json.dumps(plan, sort_keys=True)
+    aud = tuple(ctx.aud) if isinstance(ctx.aud, list) else ctx.aud
+    scopes = tuple(ctx.scopes) if ctx.scopes is not None else None
+    return (ctx.sub, ctx.tid, scopes, ctx.role, plan, ctx.iss, aud, ctx.jti)
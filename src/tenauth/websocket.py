@@ -1,11 +1,52 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
 from fastapi import HTTPException
 from starlette import status
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
-from tenauth.schemas import AccessContext, AuthContext
+from tenauth import instrumentation
+from tenauth.schemas import (
+    AccessContext,
+    AnyAccessContext,
+    AuthContext,
+    CompactAccessContext,
+)
+
+logger = logging.getLogger(__name__)
 
 
 async def websocket_access_context(websocket: WebSocket) -> AccessContext:
+    auth_context = await websocket_auth_context(websocket)
+    return AccessContext(tenant_id=auth_context.tid, user_id=auth_context.sub)
+
+
+async def websocket_compact_access_context(
+    websocket: WebSocket,
+) -> CompactAccessContext:
+    """Like `websocket_access_context`, but return a `CompactAccessContext`."""
+    auth_context = await websocket_auth_context(websocket)
+    return CompactAccessContext(tenant_id=auth_context.tid, user_id=auth_context.sub)
+
+
+async def websocket_auth_context(websocket: WebSocket) -> AuthContext:
+    """Resolve the handshake token into an AuthContext, else raise 1008."""
+    if instrumentation.hooks:
+        with instrumentation.measure(
+            instrumentation.WEBSOCKET_AUTH, cache=AuthContext.token_cache
+        ):
+            return resolve_websocket_auth_context(websocket)
+    return resolve_websocket_auth_context(websocket)
+
+
+def resolve_websocket_auth_context(websocket: WebSocket) -> AuthContext:
+    """Synchronous `websocket_auth_context`, for callers that are not endpoints."""
     token: str | None = None
     authorization = websocket.headers.get("Authorization")
 
@@ -28,15 +69,348 @@ async def websocket_access_context(websocket: WebSocket) -> AccessContext:
                     token = candidate.split("=", 1)[1].strip()
                     break
 
-    if not token:
+    return _auth_context_from_token(token)
+
+
+def _auth_context_from_token(token: object) -> AuthContext:
+    # refresh messages carry whatever JSON the client sent
+    if not isinstance(token, str) or not token:
         raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION)
 
     if token.lower().startswith("bearer "):
         token = token.split(" ", 1)[1].strip()
 
     try:
-        auth_context = AuthContext.from_token(token)
+        return AuthContext.from_token(token)
     except HTTPException as exc:
         raise WebSocketDisconnect(code=status.WS_1008_POLICY_VIOLATION) from exc
 
-    return AccessContext(tenant_id=auth_context.tid, user_id=auth_context.sub)
+
+@dataclass
+class _ManagedConnection:
+    websocket: WebSocket
+    auth: AuthContext
+    expires_at: float | None
+
+
+@dataclass(frozen=True)
+class WebSocketSessionStats:
+    active: int
+    expiring: int
+    expired: int
+    refreshed: int
+
+
+class WebSocketSessionManager:
+    """Close websockets when their token expires, using one shared timer.
+
+    Registered connections are scheduled on a single heap keyed by the
+    token's `exp`; one background task sleeps until the earliest deadline
+    and closes every expired socket with a policy-violation code. Clients
+    extend their connection by sending a refresh message with a new token
+    for the same tenant and user.
+    """
+
+    def __init__(
+        self,
+        *,
+        refresh_message_type: str = "refresh_token",
+        close_code: int = status.WS_1008_POLICY_VIOLATION,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.refresh_message_type = refresh_message_type
+        self.close_code = close_code
+        self._clock = clock
+        self._connections: dict[int, _ManagedConnection] = {}
+        self._timers: list[tuple[float, int, int]] = []
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._closing: set[asyncio.Task[None]] = set()
+        self.expired = 0
+        self.refreshed = 0
+
+    def __len__(self) -> int:
+        return len(self._connections)
+
+    def __contains__(self, websocket: WebSocket) -> bool:
+        return id(websocket) in self._connections
+
+    async def connect(self, websocket: WebSocket) -> AuthContext:
+        """Authenticate the handshake and register the socket for expiry."""
+        auth = await websocket_auth_context(websocket)
+        self.register(websocket, auth)
+        return auth
+
+    def register(self, websocket: WebSocket, auth: AuthContext) -> None:
+        key = id(websocket)
+        conn = _ManagedConnection(websocket, auth, _expiry(auth))
+        self._connections[key] = conn
+        self._schedule(key, conn.expires_at)
+
+    def unregister(self, websocket: WebSocket) -> None:
+        # the heap entry stays behind and is skipped once it comes due
+        self._connections.pop(id(websocket), None)
+
+    def auth_context(self, websocket: WebSocket) -> AuthContext | None:
+        conn = self._connections.get(id(websocket))
+        return conn.auth if conn is not None else None
+
+    def refresh(self, websocket: WebSocket, token: object) -> AuthContext:
+        """Swap in a fresh token for the same tenant/user and reschedule expiry."""
+        conn = self._connections.get(id(websocket))
+        if conn is None:
+            raise WebSocketDisconnect(code=self.close_code)
+        auth = _auth_context_from_token(token)
+        if auth.sub != conn.auth.sub or auth.tid != conn.auth.tid:
+            raise WebSocketDisconnect(code=self.close_code)
+        conn.auth = auth
+        conn.expires_at = _expiry(auth)
+        self.refreshed += 1
+        self._schedule(id(websocket), conn.expires_at)
+        return auth
+
+    def handle_message(self, websocket: WebSocket, message: Mapping[str, Any]) -> bool:
+        """Apply an in-band refresh message; return False for other messages.
+
+        Refresh messages look like `{"type": "refresh_token", "token": "..."}`.
+        """
+        if message.get("type") != self.refresh_message_type:
+            return False
+        self.refresh(websocket, message.get("token"))
+        return True
+
+    def stats(self, *, expiring_within: float = 60.0) -> WebSocketSessionStats:
+        horizon = self._clock() + expiring_within
+        expiring = sum(
+            1
+            for conn in self._connections.values()
+            if conn.expires_at is not None and conn.expires_at <= horizon
+        )
+        return WebSocketSessionStats(
+            active=len(self._connections),
+            expiring=expiring,
+            expired=self.expired,
+            refreshed=self.refreshed,
+        )
+
+    async def close(self) -> None:
+        """Stop the timer task; registered sockets are left open."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def _schedule(self, key: int, expires_at: float | None) -> None:
+        if expires_at is None:
+            return
+        if len(self._timers) > 2 * len(self._connections) + 64:
+            self._compact()
+        earliest = self._timers[0][0] if self._timers else None
+        heapq.heappush(self._timers, (expires_at, next(self._sequence), key))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        elif earliest is None or expires_at < earliest:
+            self._wakeup.set()
+
+    def _compact(self) -> None:
+        self._timers = [
+            timer
+            for timer in self._timers
+            if (conn := self._connections.get(timer[2])) is not None
+            and conn.expires_at == timer[0]
+        ]
+        heapq.heapify(self._timers)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            while self._timers and self._timers[0][0] <= now:
+                expires_at, _, key = heapq.heappop(self._timers)
+                conn = self._connections.get(key)
+                if conn is None or conn.expires_at != expires_at:
+                    continue
+                del self._connections[key]
+                self.expired += 1
+                task = asyncio.get_running_loop().create_task(
+                    self._close_expired(conn.websocket)
+                )
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            timeout = self._timers[0][0] - now if self._timers else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _close_expired(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=self.close_code, reason="Token expired")
+        except Exception as e:
+            logger.debug(f"Failed to close expired websocket: {e}")
+
+
+def _expiry(auth: AuthContext) -> float | None:
+    return float(auth.exp) if auth.exp is not None else None
+
+
+class _RegisteredSocket:
+    __slots__ = ("websocket", "access", "queue", "task")
+
+    def __init__(
+        self, websocket: WebSocket, access: CompactAccessContext, max_queue: int
+    ) -> None:
+        self.websocket = websocket
+        self.access = access
+        self.queue: asyncio.Queue[Any] = asyncio.Queue(maxsize=max_queue)
+        self.task: asyncio.Task[None] | None = None
+
+
+@dataclass(frozen=True)
+class WebSocketRegistryStats:
+    connections: int
+    tenants: int
+    users: int
+    queued: int
+    dropped: int
+
+
+class WebSocketRegistry:
+    """Live websockets indexed by tenant and user for fan-out.
+
+    Every socket gets a bounded send queue drained by its own sender task,
+    so a broadcast only enqueues and never waits on a slow client. A
+    socket whose queue is full is dropped and closed.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int = 100,
+        slow_consumer_code: int = status.WS_1008_POLICY_VIOLATION,
+    ) -> None:
+        self.max_queue = max_queue
+        self.slow_consumer_code = slow_consumer_code
+        self._sockets: dict[int, _RegisteredSocket] = {}
+        self._by_tenant: dict[Any, dict[int, _RegisteredSocket]] = {}
+        self._by_user: dict[Any, dict[int, _RegisteredSocket]] = {}
+        self._closing: set[asyncio.Task[None]] = set()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._sockets)
+
+    def __contains__(self, websocket: WebSocket) -> bool:
+        return id(websocket) in self._sockets
+
+    def add(self, websocket: WebSocket, access: AnyAccessContext) -> None:
+        """Register an accepted websocket under its tenant and user."""
+        key = id(websocket)
+        self.remove(websocket)
+        access = CompactAccessContext.from_context(access)
+        entry = _RegisteredSocket(websocket, access, self.max_queue)
+        self._sockets[key] = entry
+        self._by_tenant.setdefault(access.tenant_id, {})[key] = entry
+        self._by_user.setdefault(access.user_id, {})[key] = entry
+        entry.task = asyncio.get_running_loop().create_task(self._send_loop(entry))
+
+    def remove(self, websocket: WebSocket) -> None:
+        """Unregister a websocket, e.g. on disconnect; unknown sockets are ignored."""
+        entry = self._sockets.pop(id(websocket), None)
+        if entry is None:
+            return
+        _unindex(self._by_tenant, entry.access.tenant_id, id(websocket))
+        _unindex(self._by_user, entry.access.user_id, id(websocket))
+        if entry.task is not None and entry.task is not asyncio.current_task():
+            entry.task.cancel()
+
+    def tenant_sockets(self, tenant_id: Any) -> list[WebSocket]:
+        return [
+            entry.websocket for entry in self._by_tenant.get(tenant_id, {}).values()
+        ]
+
+    def user_sockets(self, user_id: Any) -> list[WebSocket]:
+        return [entry.websocket for entry in self._by_user.get(user_id, {}).values()]
+
+    def send_to_tenant(self, tenant_id: Any, message: Any) -> int:
+        """Queue `message` for every socket of a tenant; return the recipient count."""
+        return self._fan_out(self._by_tenant.get(tenant_id), message)
+
+    def send_to_user(self, user_id: Any, message: Any) -> int:
+        """Queue `message` for every socket of a user; return the recipient count."""
+        return self._fan_out(self._by_user.get(user_id), message)
+
+    def stats(self) -> WebSocketRegistryStats:
+        return WebSocketRegistryStats(
+            connections=len(self._sockets),
+            tenants=len(self._by_tenant),
+            users=len(self._by_user),
+            queued=sum(entry.queue.qsize() for entry in self._sockets.values()),
+            dropped=self.dropped,
+        )
+
+    async def close(self) -> None:
+        """Cancel all sender tasks and forget every socket."""
+        tasks = [entry.task for entry in self._sockets.values() if entry.task]
+        for websocket in [entry.websocket for entry in self._sockets.values()]:
+            self.remove(websocket)
+        await asyncio.gather(*tasks, *self._closing, return_exceptions=True)
+
+    def _fan_out(
+        self, entries: dict[int, _RegisteredSocket] | None, message: Any
+    ) -> int:
+        if not entries:
+            return 0
+        sent = 0
+        for entry in list(entries.values()):
+            try:
+                entry.queue.put_nowait(message)
+                sent += 1
+            except asyncio.QueueFull:
+                self._drop(entry)
+        return sent
+
+    def _drop(self, entry: _RegisteredSocket) -> None:
+        self.dropped += 1
+        self.remove(entry.websocket)
+        task = asyncio.get_running_loop().create_task(self._close_slow(entry.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_slow(self, websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=self.slow_consumer_code, reason="Slow consumer")
+        except Exception as e:
+            logger.debug(f"Failed to close slow websocket: {e}")
+
+    async def _send_loop(self, entry: _RegisteredSocket) -> None:
+        websocket = entry.websocket
+        while True:
+            message = await entry.queue.get()
+            try:
+                if isinstance(message, str):
+                    await websocket.send_text(message)
+                elif isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                else:
+                    await websocket.send_json(message)
+            except Exception as e:
+                logger.debug(f"Dropping websocket after failed send: {e}")
+                self.remove(websocket)
+                return
+
+
+def _unindex(
+    index: dict[Any, dict[int, _RegisteredSocket]], value: Any, key: int
+) -> None:
+    entries = index.get(value)
+    if entries is not None:
+        entries.pop(key, None)
+        if not entries:
+            del index[value]
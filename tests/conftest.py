@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Async SQLite engine with set_config/current_setting stand-ins.
+
+    Returns `(engine, calls)`, where `calls["set_config"]` counts bindings.
+    Settings made with `is_local` end with the transaction, as in Postgres.
+    """
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'db.sqlite'}", pool_size=1
+    )
+    calls = {"set_config": 0}
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def register_functions(dbapi_connection, record):
+        gucs: dict[str, str] = {}
+        local: set[str] = set()
+        record.info["tenauth.test_gucs"] = (gucs, local)
+
+        def set_config(name: str, value: str, is_local: bool) -> str:
+            calls["set_config"] += 1
+            gucs[name] = value
+            if is_local:
+                local.add(name)
+            return value
+
+        dbapi_connection.create_function("set_config", 3, set_config)
+        dbapi_connection.create_function(
+            "current_setting", 2, lambda name, _missing_ok: gucs.get(name)
+        )
+
+    def end_transaction(conn) -> None:
+        gucs, local = conn.connection.info["tenauth.test_gucs"]
+        for name in local:
+            gucs.pop(name, None)
+        local.clear()
+
+    event.listen(engine.sync_engine, "commit", end_transaction)
+    event.listen(engine.sync_engine, "rollback", end_transaction)
+    return engine, calls
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+
+from tenauth.admission import AdmissionRejected, TenantAdmissionController
+from tenauth.fastapi import build_access_scoped_session_dependency
+from tenauth.schemas import AccessContext
+from tenauth.testing import FakeSession
+
+TENANT = UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb")
+OTHER = UUID("cccccccc-cccc-cccc-cccc-cccccccccccc")
+USER = UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+
+
+@pytest.mark.asyncio
+async def test_admission_queues_in_order_and_hands_over_slots():
+    controller = TenantAdmissionController(max_concurrent=1, max_queue=5, timeout=1.0)
+    order: list[int] = []
+    release = asyncio.Event()
+
+    async def worker(n: int) -> None:
+        async with controller.admit(TENANT):
+            order.append(n)
+            if n == 0:
+                await release.wait()
+
+    tasks = [asyncio.create_task(worker(n)) for n in range(3)]
+    await asyncio.sleep(0.01)
+    stats = controller.stats()
+    assert (stats.active, stats.queued) == (1, 2)
+
+    async with controller.admit(OTHER):  # other tenants are not held up
+        pass
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2]
+    stats = controller.stats()
+    assert (stats.active, stats.queued, stats.admitted, stats.queued_total) == (
+        0,
+        0,
+        4,
+        2,
+    )
+    assert stats.max_wait_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_when_queue_is_full_or_wait_times_out():
+    controller = TenantAdmissionController(max_concurrent=1, max_queue=1, timeout=0.05)
+    hold = asyncio.Event()
+
+    async def holder() -> None:
+        async with controller.admit(TENANT):
+            await hold.wait()
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(controller.admit(TENANT).__aenter__())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected, match="too many concurrent"):
+        async with controller.admit(TENANT):
+            pass
+    with pytest.raises(AdmissionRejected, match="timed out"):
+        await waiter
+
+    hold.set()
+    await task
+    stats = controller.stats()
+    assert (stats.rejected_concurrency, stats.timeouts, stats.rejected) == (1, 1, 2)
+    assert (stats.active, stats.queued) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_admission_rate_limit_delays_then_rejects():
+    controller = TenantAdmissionController(rate=50, burst=1, timeout=0.03)
+
+    async with controller.admit(TENANT):
+        pass
+    async with controller.admit(TENANT):  # waits ~20ms for the next token
+        pass
+    async with controller.admit(TENANT):  # reserves the following token
+        pass
+
+    stats = controller.stats()
+    assert stats.admitted == 3
+    assert stats.wait_seconds >= 0.03
+
+    slow = TenantAdmissionController(rate=1, burst=1, timeout=0.1)
+    async with slow.admit(TENANT):
+        pass
+    with pytest.raises(AdmissionRejected) as excinfo:
+        async with slow.admit(TENANT):
+            pass
+    assert excinfo.value.reason == "rate limit exceeded"
+    assert 0.9 < excinfo.value.retry_after <= 1.0
+    assert slow.stats().rejected_rate == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_state_stays_bounded():
+    now = [0.0]
+    controller = TenantAdmissionController(
+        max_tenants=3, idle_ttl=10, clock=lambda: now[0]
+    )
+    tenants = [UUID(int=n) for n in range(5)]
+    for tenant in tenants:
+        async with controller.admit(tenant):
+            pass
+    assert len(controller) == 3
+
+    now[0] = 20.0
+    async with controller.admit(tenants[0]):
+        assert len(controller) == 1
+
+
+@pytest.mark.asyncio
+async def test_session_dependency_returns_429_when_rejected():
+    session = FakeSession()
+
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    controller = TenantAdmissionController(max_concurrent=1, max_queue=0)
+    dependency = build_access_scoped_session_dependency(
+        factory, single_statement=True, admission=controller
+    )
+    access = AccessContext(tenant_id=TENANT, user_id=USER)
+
+    first = dependency(tenant=access)
+    assert await anext(first) is session
+    with pytest.raises(HTTPException) as excinfo:
+        await anext(dependency(tenant=access))
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.headers == {"Retry-After": "1"}
+
+    with pytest.raises(StopAsyncIteration):
+        await anext(first)
+    assert controller.stats().active == 0
+    assert session.gucs == {}
@@ -136,3 +136,16 @@ def test_authcontext_from_token_invalid_raises_401(bad_token: str):
     with pytest.raises(HTTPException) as exc:
         AuthContext.from_token(bad_token)
     assert exc.value.status_code == 401
+
+
+def test_authcontext_fast_parser_matches_default():
+    assert AuthContext.from_token(JWT_TOKEN, fast=True) == AuthContext.from_token(
+        JWT_TOKEN
+    )
+
+
+@pytest.mark.parametrize("bad_token", ["not-a-jwt", "e30.e30.e30", "x.bm90LWpzb24."])
+def test_authcontext_fast_parser_invalid_raises_401(bad_token: str):
+    with pytest.raises(HTTPException) as exc:
+        AuthContext.from_token(bad_token, fast=True)
+    assert exc.value.status_code == 401
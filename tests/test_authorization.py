@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from tenauth.authorization import ScopeRegistry, has_role, has_scopes
+from tenauth.fastapi import require_role, require_scopes
+from tenauth.schemas import AuthContext
+from tenauth.utils import create_bearer_token
+
+
+def _ctx(scopes: list[str] | None = None, role: str | None = None) -> AuthContext:
+    return AuthContext(
+        sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+        scopes=scopes,
+        role=role,
+    )
+
+
+@pytest.mark.parametrize(
+    "granted,required,allowed",
+    [
+        (["datasets:read"], ["datasets:read"], True),
+        (["datasets:read"], ["datasets:read", "datasets:write"], False),
+        (["datasets:*"], ["datasets:read", "datasets:items:delete"], True),
+        (["datasets"], ["datasets:write"], True),
+        (["datasets:read"], ["datasets"], False),
+        (["datasets:read"], ["datasets:*"], False),
+        (["datasets"], ["datasets:*"], True),
+        (["*"], ["members:invite", "datasets:read"], True),
+        (["datasetsx:read"], ["datasets:read"], False),
+        (None, ["datasets:read"], False),
+        (None, [], True),
+    ],
+)
+def test_scope_matching(granted, required, allowed):
+    assert has_scopes(_ctx(granted), *required, registry=ScopeRegistry()) is allowed
+
+
+def test_granted_mask_is_computed_once_per_token_and_registry_version(monkeypatch):
+    import tenauth.authorization as authorization
+
+    calls = []
+    original = authorization._scope_path
+    monkeypatch.setattr(
+        authorization,
+        "_scope_path",
+        lambda scope: calls.append(scope) or original(scope),
+    )
+    registry = ScopeRegistry()
+    read = registry.compile(["datasets:read"])
+    ctx = _ctx(["datasets:*"])
+    calls.clear()
+
+    assert registry.has_scopes(ctx, read)
+    assert registry.has_scopes(ctx, read)
+    assert len(calls) == 1
+
+    write = registry.compile(["datasets:write"])
+    calls.clear()
+    assert registry.has_scopes(ctx, write)
+    assert registry.has_scopes(ctx, write)
+    assert len(calls) == 1
+
+
+def test_granted_mask_follows_narrowed_scopes():
+    registry = ScopeRegistry()
+    write = registry.compile(["datasets:write"])
+    ctx = _ctx(["datasets:*"])
+    assert registry.has_scopes(ctx, write)
+
+    narrowed = ctx.model_copy(update={"scopes": ["datasets:read"]})
+    assert not registry.has_scopes(narrowed, write)
+    assert registry.has_scopes(ctx, write)
+
+    ctx.scopes = []
+    assert not registry.has_scopes(ctx, write)
+
+
+def test_role_hierarchy():
+    assert has_role(_ctx(role="owner"), "admin")
+    assert has_role(_ctx(role="editor"), "editor")
+    assert not has_role(_ctx(role="viewer"), "editor")
+    assert not has_role(_ctx(role="superuser"), "viewer")
+    with pytest.raises(ValueError):
+        has_role(_ctx(role="owner"), "superuser")
+
+
+def test_require_scopes_and_role_dependencies():
+    app = FastAPI()
+
+    @app.get("/datasets", dependencies=[Depends(require_scopes("datasets:read"))])
+    async def datasets():
+        return {"ok": True}
+
+    @app.delete("/members", dependencies=[Depends(require_role("admin"))])
+    async def members():
+        return {"ok": True}
+
+    client = TestClient(app)
+    editor = {"Authorization": create_bearer_token(_ctx(["datasets:*"], role="editor"))}
+    owner = {"Authorization": create_bearer_token(_ctx(["members:*"], role="owner"))}
+
+    assert client.get("/datasets", headers=editor).status_code == 200
+    assert client.delete("/members", headers=editor).status_code == 403
+    assert client.get("/datasets", headers=owner).status_code == 403
+    assert client.delete("/members", headers=owner).status_code == 200
+    assert client.get("/datasets").status_code == 401
+    with pytest.raises(ValueError):
+        require_role("superuser")
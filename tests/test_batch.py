@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import logging
+from uuid import UUID
+
+import pytest
+
+from tenauth.batch import validate_tokens
+from tenauth.revocation import RevocationIndex
+from tenauth.schemas import AuthContext
+from tenauth.utils import create_bearer_token
+
+BEARER = create_bearer_token(
+    AuthContext(
+        sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+    )
+)
+TOKEN = BEARER.split(" ", 1)[1]
+
+
+def test_validate_tokens_keeps_order_and_reports_errors(
+    caplog: pytest.LogCaptureFixture,
+):
+    with caplog.at_level(logging.WARNING):
+        results = validate_tokens([TOKEN, "not-a-jwt", BEARER, "e30.e30.e30", ""])
+
+    assert [r.ok for r in results] == [True, False, True, False, False]
+    assert results[0].context == results[2].context
+    assert results[1].error.startswith("ValueError")
+    assert results[4].error == "Missing token"
+    assert caplog.records == []
+
+
+def test_validate_tokens_deduplicates(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+    parse = AuthContext._parse_token
+
+    def counting(token: str) -> AuthContext:
+        calls.append(token)
+        return parse(token)
+
+    monkeypatch.setattr(AuthContext, "_parse_token", counting)
+
+    results = validate_tokens([TOKEN] * 100)
+
+    assert len(results) == 100
+    assert calls == [TOKEN]
+    assert all(r is results[0] for r in results)
+
+
+def test_validate_tokens_reports_non_string_entries():
+    results = validate_tokens([None, TOKEN, 42, ["token"]])
+
+    assert [r.ok for r in results] == [False, True, False, False]
+    assert results[0].error == "Token must be a string, not NoneType"
+    assert results[3].token == ["token"]
+
+
+def test_validate_tokens_checks_the_revocation_index():
+    index = RevocationIndex()
+    index.revoke(sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"))
+
+    [result] = validate_tokens([TOKEN], revocation_index=index)
+
+    assert not result.ok
+    assert "revoked" in result.error
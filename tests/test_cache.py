@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import pytest
+
+from tenauth.cache import TokenCache
+from tenauth.schemas import AuthContext
+from tenauth.utils import create_bearer_token
+
+
+class _Clock:
+    def __init__(self, now: float = 1_700_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _token(exp: int | None = None, role: str = "viewer") -> str:
+    ctx = AuthContext(
+        sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+        role=role,
+        exp=exp,
+    )
+    return create_bearer_token(ctx).split(" ", 1)[1]
+
+
+def test_from_token_uses_cache_for_repeated_tokens():
+    cache = TokenCache(max_size=4, ttl=60, clock=_Clock())
+    token = _token()
+
+    first = AuthContext.from_token(token, cache=cache)
+    second = AuthContext.from_token(token, cache=cache)
+
+    assert first == second
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_cached_contexts_are_not_shared_between_callers():
+    cache = TokenCache(clock=_Clock())
+    ctx = AuthContext(
+        sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+        role="viewer",
+        scopes=["read"],
+        plan={"features": ["sso"]},
+    )
+    token = create_bearer_token(ctx).split(" ", 1)[1]
+
+    for _ in range(2):
+        auth = AuthContext.from_token(token, cache=cache)
+        auth.role = "owner"
+        auth.scopes.append("admin")
+        auth.plan["features"].append("audit")
+
+    assert AuthContext.from_token(token, cache=cache) == ctx
+    assert cache.stats().hits == 2
+
+
+def test_cache_entries_never_outlive_token_exp():
+    clock = _Clock()
+    cache = TokenCache(ttl=600, clock=clock)
+    token = _token(exp=int(clock.now) + 10)
+
+    AuthContext.from_token(token, cache=cache)
+    clock.now += 11
+
+    assert cache.get(token) is None
+    assert cache.stats().expirations == 1
+
+
+def test_cache_skips_expired_tokens():
+    clock = _Clock()
+    cache = TokenCache(clock=clock)
+
+    AuthContext.from_token(_token(exp=int(clock.now) - 1), cache=cache)
+
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TokenCache(max_size=2, clock=_Clock())
+    tokens = [_token(role=role) for role in ("viewer", "editor", "admin")]
+
+    AuthContext.from_token(tokens[0], cache=cache)
+    AuthContext.from_token(tokens[1], cache=cache)
+    AuthContext.from_token(tokens[0], cache=cache)
+    AuthContext.from_token(tokens[2], cache=cache)
+
+    assert cache.get(tokens[1]) is None
+    assert cache.get(tokens[0]) is not None
+    assert cache.stats().evictions == 1
+
+
+def test_class_level_cache_is_used_by_default(monkeypatch: pytest.MonkeyPatch):
+    cache = TokenCache(clock=_Clock())
+    monkeypatch.setattr(AuthContext, "token_cache", cache)
+    token = _token()
+
+    AuthContext.from_token(token)
+    AuthContext.from_token(token)
+
+    assert cache.stats().hits == 1
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+from uuid import UUID
+
+import httpx
+import pytest
+
+from tenauth.client import BearerAuth, TenantClients
+from tenauth.schemas import AuthContext
+from tenauth.utils import TokenMinter
+
+NOW = 1_700_000_000
+CTX = AuthContext(
+    sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+    tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+)
+
+
+class CountingFactory:
+    def __init__(self, clock, ttl: int = 600) -> None:
+        self.clock = clock
+        self.ttl = ttl
+        self.calls = 0
+
+    def __call__(self, ctx: AuthContext) -> str:
+        self.calls += 1
+        minter = TokenMinter(b"secret", ttl=self.ttl, clock=self.clock)
+        return minter.mint(ctx)
+
+
+def _echo_transport(
+    seen: list[str], reject: set[str] | None = None
+) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        header = request.headers["Authorization"]
+        seen.append(header)
+        if reject and header in reject:
+            return httpx.Response(401)
+        return httpx.Response(200)
+
+    return httpx.MockTransport(handler)
+
+
+def test_sync_auth_reuses_token_until_refresh_margin():
+    now = [NOW]
+    factory = CountingFactory(lambda: now[0])
+    auth = BearerAuth(
+        CTX, factory, refresh_margin=60, background_refresh=False, clock=lambda: now[0]
+    )
+    seen: list[str] = []
+    with httpx.Client(transport=_echo_transport(seen), auth=auth) as client:
+        client.get("https://svc.test/a")
+        client.get("https://svc.test/b")
+        now[0] += 541
+        client.get("https://svc.test/c")
+
+    assert factory.calls == 2
+    assert seen[0] == seen[1] != seen[2]
+    assert seen[0].startswith("Bearer ")
+
+
+def test_sync_auth_retries_once_with_new_token_on_401():
+    now = [NOW]
+    factory = CountingFactory(lambda: now[0])
+    auth = BearerAuth(CTX, factory, clock=lambda: now[0])
+    first = f"Bearer {auth.sync_token()}"
+    now[0] += 1
+    seen: list[str] = []
+    with httpx.Client(
+        transport=_echo_transport(seen, reject={first}), auth=auth
+    ) as client:
+        response = client.get("https://svc.test/")
+
+    assert response.status_code == 200
+    assert seen[0] == first != seen[1]
+    assert factory.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_async_auth_single_flight_and_background_refresh():
+    now = [NOW]
+    calls = 0
+    release = asyncio.Event()
+
+    async def factory(ctx: AuthContext) -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return TokenMinter(b"secret", ttl=600, clock=lambda: now[0]).mint(ctx)
+
+    auth = BearerAuth(CTX, factory, clock=lambda: now[0])
+    waiters = [asyncio.create_task(auth.async_token()) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    tokens = await asyncio.gather(*waiters)
+    assert calls == 1
+    assert len(set(tokens)) == 1
+
+    # inside the refresh window the old token is served while one task refreshes
+    now[0] += 550
+    assert await auth.async_token() == tokens[0]
+    assert await auth.async_token() == tokens[0]
+    await auth._refresh_task
+    assert calls == 2
+    assert await auth.async_token() != tokens[0]
+
+
+@pytest.mark.asyncio
+async def test_tenant_clients_pool_one_client_per_tenant():
+    now = [NOW]
+    seen: list[str] = []
+    clients = TenantClients(
+        CountingFactory(lambda: now[0]),
+        transport=_echo_transport(seen),
+        clock=lambda: now[0],
+    )
+    other = CTX.model_copy(update={"sub": UUID("cccccccc-cccc-cccc-cccc-cccccccccccc")})
+
+    client = clients.client(CTX.tid)
+    assert clients.client(other.tid) is client
+    assert clients.auth(CTX) is clients.auth(CTX)
+    assert clients.auth(other) is not clients.auth(CTX)
+
+    await client.get("https://svc.test/", auth=clients.auth(CTX))
+    await client.get("https://svc.test/", auth=clients.auth(other))
+    assert seen[0] != seen[1]
+    assert len(clients) == 1
+
+    await clients.aclose()
+    assert len(clients) == 0
+
+
+def test_tenant_clients_key_auths_on_all_claims():
+    clients = TenantClients(lambda ctx: "token", max_auths=2)
+    narrow = CTX.model_copy(update={"scopes": ["read"]})
+    broad = CTX.model_copy(update={"scopes": ["read", "write"]})
+
+    assert clients.auth(narrow) is not clients.auth(broad)
+    assert clients.auth(narrow).ctx.scopes == ["read"]
+    assert clients.auth(narrow.model_copy()) is clients.auth(narrow)
+
+    first = clients.auth(narrow)
+    clients.auth(CTX)  # evicts `broad`, the least recently used
+    assert clients.auth(narrow) is first
+    assert clients.auth(broad) is not first
+    assert len(clients._auths) == 2
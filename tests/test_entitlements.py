@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from tenauth.entitlements import EntitlementCache, Entitlements
+from tenauth.fastapi import get_entitlements, require_feature
+from tenauth.schemas import AuthContext
+from tenauth.utils import create_bearer_token
+
+PLANS = {
+    "pro": {
+        "features": ["sso", "audit-log"],
+        "limits": {"seats": 25, "datasets": None},
+    },
+}
+
+
+def _ctx(plan) -> AuthContext:
+    return AuthContext(
+        sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+        plan=plan,
+    )
+
+
+def test_named_plan_resolves_from_catalogue():
+    cache = EntitlementCache(PLANS)
+
+    entitlements = cache.resolve("pro")
+
+    assert entitlements.plan == "pro"
+    assert entitlements.has_feature("sso")
+    assert entitlements.limit("seats") == 25
+    assert entitlements.within_limit("datasets", 10_000)
+    assert not entitlements.within_limit("seats", 26)
+    assert not entitlements.within_limit("exports", 1)
+    with pytest.raises(TypeError):
+        entitlements.limits["seats"] = 100
+
+
+def test_dict_claims_extend_base_plan_and_identical_plans_share_instance():
+    cache = EntitlementCache(PLANS)
+    claim = {
+        "plan": "pro",
+        "features": {"beta": True, "sso": False},
+        "limits": {"seats": 50},
+    }
+
+    first = cache.for_context(_ctx(claim))
+    second = cache.for_context(_ctx(dict(reversed(list(claim.items())))))
+
+    assert first is second
+    assert first.features == frozenset({"audit-log", "beta"})
+    assert first.limit("seats") == 50
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.resolve(None).features == frozenset()
+
+
+def test_for_context_memoises_on_the_token_until_plans_change():
+    cache = EntitlementCache(PLANS)
+    ctx = _ctx("pro")
+
+    assert cache.for_context(ctx) is cache.for_context(ctx)
+    assert cache.misses == 1 and cache.hits == 0
+
+    cache.load_plans({"pro": {"features": ["sso"]}})
+    assert cache.for_context(ctx).features == frozenset({"sso"})
+
+
+def test_for_context_follows_plan_changes_on_copies():
+    cache = EntitlementCache({**PLANS, "free": {"features": []}})
+    ctx = _ctx({"plan": "pro"})
+    assert cache.for_context(ctx).has_feature("sso")
+
+    downgraded = ctx.model_copy(update={"plan": "free"})
+    assert not cache.for_context(downgraded).has_feature("sso")
+    assert cache.for_context(ctx).has_feature("sso")
+
+    ctx.plan["plan"] = "free"  # edited in place
+    assert not cache.for_context(ctx).has_feature("sso")
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        EntitlementCache().resolve({"limits": {"seats": "many"}})
+
+
+def test_feature_gating_dependency(monkeypatch):
+    from tenauth import fastapi as tenauth_fastapi
+
+    monkeypatch.setattr(tenauth_fastapi, "entitlement_cache", EntitlementCache(PLANS))
+    app = FastAPI()
+
+    @app.get("/sso")
+    async def sso(entitlements: Entitlements = Depends(require_feature("sso"))):
+        return {"plan": entitlements.plan}
+
+    @app.get("/limits")
+    async def limits(entitlements: Entitlements = Depends(get_entitlements)):
+        return {"seats": entitlements.limit("seats")}
+
+    client = TestClient(app)
+    pro = {"Authorization": create_bearer_token(_ctx("pro"))}
+    free = {"Authorization": create_bearer_token(_ctx("free"))}
+
+    assert client.get("/sso", headers=pro).json() == {"plan": "pro"}
+    assert client.get("/sso", headers=free).status_code == 403
+    assert client.get("/limits", headers=free).json() == {"seats": 0}
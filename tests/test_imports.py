@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import tenauth
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def _loaded_modules(code: str) -> set[str]:
+    probe = f"{code}\nimport sys\nprint(' '.join(sys.modules))"
+    path = os.pathsep.join([str(SRC), os.environ.get("PYTHONPATH", "")])
+    env = {**os.environ, "PYTHONPATH": path}
+    output = subprocess.run(
+        [sys.executable, "-c", probe],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stdout
+    return set(output.split())
+
+
+def test_core_names_do_not_import_web_or_db_stack():
+    modules = _loaded_modules(
+        "import tenauth; tenauth.AuthContext; tenauth.validate_tokens; "
+        "tenauth.dsn_with_tenant"
+    )
+    assert not modules & {"fastapi", "starlette", "sqlalchemy", "sqlmodel"}
+
+
+def test_public_names_resolve_lazily():
+    from tenauth.fastapi import get_auth_context
+
+    assert tenauth.get_auth_context is get_auth_context
+    assert set(tenauth.__all__) <= set(dir(tenauth))
+    with pytest.raises(AttributeError):
+        tenauth.missing_name
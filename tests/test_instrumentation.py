@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from tenauth import instrumentation
+from tenauth.cache import TokenCache
+from tenauth.fastapi import get_auth_context
+from tenauth.instrumentation import InstrumentationEvent
+from tenauth.schemas import AuthContext
+from tenauth.utils import create_bearer_token
+
+
+@pytest.fixture
+def events(monkeypatch: pytest.MonkeyPatch) -> list[InstrumentationEvent]:
+    monkeypatch.setattr(instrumentation, "hooks", [])
+    recorded: list[InstrumentationEvent] = []
+    instrumentation.add_hook(recorded.append)
+    return recorded
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/whoami")
+    def whoami(auth: AuthContext = Depends(get_auth_context)):
+        return {"sub": str(auth.sub)}
+
+    return TestClient(app)
+
+
+def _bearer() -> str:
+    return create_bearer_token(
+        AuthContext(
+            sub=UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+            tid=UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+        )
+    )
+
+
+def test_get_auth_context_reports_parse_and_cache_hits(
+    events: list[InstrumentationEvent], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(AuthContext, "token_cache", TokenCache())
+    client = _client()
+
+    for _ in range(2):
+        assert (
+            client.get("/whoami", headers={"Authorization": _bearer()}).status_code
+            == 200
+        )
+
+    assert [e.name for e in events] == [instrumentation.AUTH_PARSE] * 2
+    assert [e.cache_hit for e in events] == [False, True]
+    assert all(e.ok and e.duration >= 0 for e in events)
+
+
+def test_get_auth_context_reports_failure_reason(events: list[InstrumentationEvent]):
+    r = _client().get("/whoami", headers={"Authorization": "Bearer not-a-jwt"})
+
+    assert r.status_code == 401
+    assert events[0].error == "HTTPException: Invalid token"
+    assert events[0].cache_hit is None
+
+
+def test_failing_hook_does_not_break_requests(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(instrumentation, "hooks", [])
+
+    def broken(_event: InstrumentationEvent) -> None:
+        raise RuntimeError("boom")
+
+    instrumentation.add_hook(broken)
+    r = _client().get("/whoami", headers={"Authorization": _bearer()})
+    assert r.status_code == 200
+
+    instrumentation.remove_hook(broken)
+    assert instrumentation.hooks == []
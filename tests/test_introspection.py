@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+from urllib.parse import parse_qs
+from uuid import UUID
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from tenauth.fastapi import build_introspection_auth_dependency
+from tenauth.introspection import IntrospectionClient
+from tenauth.jwks import TokenVerificationError
+from tenauth.schemas import AuthContext
+
+NOW = 1_700_000_000
+URL = "https://idp.test/oauth2/introspect"
+ACTIVE = {
+    "active": True,
+    "sub": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+    "tid": "bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb",
+    "scope": "datasets:read datasets:write",
+    "exp": NOW + 120,
+}
+
+
+class StandInServer:
+    """Introspection endpoint backed by a dict of token -> response."""
+
+    def __init__(self, responses: dict[str, dict], delay: float = 0.0) -> None:
+        self.responses = responses
+        self.delay = delay
+        self.calls: list[str] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        form = parse_qs(request.content.decode())
+        token = form["token"][0]
+        self.calls.append(token)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if token == "broken":
+            return httpx.Response(503)
+        return httpx.Response(200, json=self.responses.get(token, {"active": False}))
+
+
+def _client(server: StandInServer, now: list[float]) -> IntrospectionClient:
+    transport = httpx.MockTransport(server)
+    return IntrospectionClient(
+        URL,
+        auth=("svc", "secret"),
+        client=httpx.AsyncClient(transport=transport),
+        negative_ttl=5,
+        clock=lambda: now[0],
+    )
+
+
+@pytest.mark.asyncio
+async def test_active_tokens_are_cached_until_exp():
+    now = [NOW]
+    server = StandInServer({"opaque": dict(ACTIVE)})
+    client = _client(server, now)
+
+    ctx = await client.auth_context("opaque")
+    assert ctx.sub == UUID(ACTIVE["sub"])
+    assert ctx.scopes == ["datasets:read", "datasets:write"]
+    assert await client.auth_context("opaque") == ctx
+    assert server.calls == ["opaque"]
+
+    now[0] = ACTIVE["exp"]
+    await client.auth_context("opaque")
+    assert server.calls == ["opaque", "opaque"]
+
+
+@pytest.mark.asyncio
+async def test_inactive_tokens_are_cached_briefly_and_failures_not_at_all():
+    now = [NOW]
+    server = StandInServer({})
+    client = _client(server, now)
+
+    for _ in range(2):
+        with pytest.raises(TokenVerificationError, match="not active"):
+            await client.auth_context("revoked")
+    assert server.calls == ["revoked"]
+    now[0] += 5
+    assert await client.lookup("revoked") is None
+    assert server.calls == ["revoked", "revoked"]
+
+    for _ in range(2):
+        with pytest.raises(TokenVerificationError, match="Introspection failed"):
+            await client.auth_context("broken")
+    assert server.calls.count("broken") == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request():
+    server = StandInServer({"opaque": dict(ACTIVE)}, delay=0.01)
+    client = _client(server, [NOW])
+
+    results = await asyncio.gather(*(client.auth_context("opaque") for _ in range(20)))
+
+    assert server.calls == ["opaque"]
+    assert len({r.sub for r in results}) == 1
+    results[0].scopes.append("admin")
+    assert results[1].scopes == ["datasets:read", "datasets:write"]
+    assert (await client.auth_context("opaque")).scopes == results[1].scopes
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_fail_the_others():
+    server = StandInServer({"opaque": dict(ACTIVE)}, delay=0.02)
+    client = _client(server, [NOW])
+
+    first = asyncio.create_task(client.auth_context("opaque"))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(client.auth_context("opaque")) for _ in range(3)]
+    await asyncio.sleep(0)
+    first.cancel()
+
+    results = await asyncio.gather(*followers)
+    assert first.cancelled()
+    assert server.calls == ["opaque"]
+    assert all(str(r.sub) == ACTIVE["sub"] for r in results)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("payload", [["active"], "active", 42])
+async def test_non_object_responses_are_inactive(payload):
+    server = StandInServer({"odd": payload})
+    client = _client(server, [NOW])
+
+    assert await client.lookup("odd") is None
+
+
+def test_introspection_dependency_maps_inactive_tokens_to_401():
+    responses = {"opaque": dict(ACTIVE, exp=4102444800)}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = parse_qs(request.content.decode())["token"][0]
+        return httpx.Response(200, json=responses.get(token, {"active": False}))
+
+    client = IntrospectionClient(
+        URL, client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(
+        auth: AuthContext = Depends(build_introspection_auth_dependency(client)),
+    ):
+        return {"sub": str(auth.sub)}
+
+    http = TestClient(app)
+    assert http.get("/me", headers={"Authorization": "Bearer opaque"}).json() == {
+        "sub": ACTIVE["sub"]
+    }
+    response = http.get("/me", headers={"Authorization": "Bearer unknown"})
+    assert response.status_code == 401
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+import pytest
+from sqlalchemy import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from tenauth.context import get_current_access_context
+from tenauth.jobs import TenantJobRunner
+from tenauth.schemas import AccessContext
+
+USER = UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+TENANTS = [AccessContext(tenant_id=UUID(int=n + 1), user_id=USER) for n in range(6)]
+
+_CURRENT_TENANT = text("SELECT current_setting('app.tenant_id', true)")
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-run; not caught as a job failure."""
+
+
+def _factory(
+    engine, sessions: list | None = None, *, fail_first_rollback: bool = False
+):
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            if fail_first_rollback and not sessions:
+
+                async def rollback() -> None:
+                    raise ConnectionError("connection lost")
+
+                session.rollback = rollback
+            if sessions is not None:
+                sessions.append(session)
+            yield session
+
+    return factory
+
+
+async def _current_tenant(session) -> str | None:
+    return (await session.execute(_CURRENT_TENANT)).scalar()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_runner_reuses_sessions_and_reports_per_tenant(sqlite_engine):
+    engine, calls = sqlite_engine
+    sessions: list = []
+    seen = []
+
+    async def job(session, ctx: AccessContext) -> None:
+        assert await _current_tenant(session) == str(ctx.tenant_id)
+        assert get_current_access_context() is ctx
+        await asyncio.sleep(0.001)
+        seen.append(ctx.tenant_id)
+        if ctx is TENANTS[2]:
+            raise ValueError("bad data")
+
+    runner = TenantJobRunner(_factory(engine, sessions), concurrency=2)
+    report = await runner.run(TENANTS, job)
+
+    assert len(sessions) == 2
+    assert sorted(seen) == sorted(ctx.tenant_id for ctx in TENANTS)
+    assert [r.tenant_id for r in report.results] == [ctx.tenant_id for ctx in TENANTS]
+    assert report.succeeded == 5
+    assert [(r.tenant_id, r.error) for r in report.failed] == [
+        (TENANTS[2].tenant_id, "ValueError: bad data")
+    ]
+    assert all(r.duration > 0 for r in report.results)
+    # one binding statement per tenant, no reset round trips
+    assert calls["set_config"] == 2 * len(TENANTS)
+    assert all(s.info == {} for s in sessions)
+    async with _factory(engine)() as session:
+        assert await _current_tenant(session) is None
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_runner_rebinds_after_the_job_commits(sqlite_engine):
+    engine, calls = sqlite_engine
+    observed = []
+
+    async def job(session, ctx: AccessContext) -> None:
+        await session.commit()
+        observed.append(await _current_tenant(session))
+
+    report = await TenantJobRunner(_factory(engine), concurrency=1).run(
+        TENANTS[:2], job
+    )
+
+    assert report.succeeded == 2
+    assert observed == [str(ctx.tenant_id) for ctx in TENANTS[:2]]
+    assert calls["set_config"] == 2 * 2 * 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_runner_replaces_session_when_rollback_fails(sqlite_engine):
+    engine, _calls = sqlite_engine
+    sessions: list = []
+
+    async def job(session, ctx):
+        if ctx is TENANTS[0]:
+            raise RuntimeError("boom")
+
+    factory = _factory(engine, sessions, fail_first_rollback=True)
+    report = await TenantJobRunner(factory, concurrency=1).run(TENANTS[:3], job)
+
+    assert len(sessions) == 2
+    assert report.succeeded == 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_runner_resumes_from_checkpoint(sqlite_engine, tmp_path):
+    engine, _calls = sqlite_engine
+    checkpoint = tmp_path / "progress"
+    calls = []
+
+    async def crashing(session, ctx):
+        calls.append(ctx)
+        if ctx is TENANTS[3]:
+            raise Crash
+
+    runner = TenantJobRunner(_factory(engine), concurrency=1, checkpoint=checkpoint)
+    with pytest.raises(Crash):
+        await runner.run(TENANTS, crashing)
+    assert checkpoint.read_text().split() == [str(ctx.tenant_id) for ctx in TENANTS[:3]]
+
+    attempts = []
+
+    async def flaky(session, ctx):
+        calls.append(ctx)
+        if ctx is TENANTS[4]:
+            attempts.append(ctx)
+            if len(attempts) == 1:
+                raise ValueError("try again")
+
+    calls.clear()
+    report = await runner.run(TENANTS, flaky)
+    assert report.skipped == 3
+    assert calls == TENANTS[3:]
+    assert len(report.failed) == 1
+    assert checkpoint.exists()
+
+    calls.clear()
+    report = await runner.run(TENANTS, flaky)
+    assert (report.skipped, report.succeeded, calls) == (5, 1, [TENANTS[4]])
+    assert not checkpoint.exists()
+    await engine.dispose()
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+
+from tenauth.jwks import KeyStore, TokenVerificationError
+from tenauth.schemas import AuthContext
+
+NOW = 1_700_000_000
+SECRET = b"tenauth-test-secret"
+CLAIMS = {
+    "sub": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+    "tid": "bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb",
+    "exp": NOW + 60,
+}
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _int_b64(value: int, length: int) -> str:
+    return _b64(value.to_bytes(length, "big"))
+
+
+def _signing_input(header: dict, claims: dict) -> str:
+    return f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(claims).encode())}"
+
+
+def _hs256_token(claims: dict = CLAIMS, kid: str = "hs", secret: bytes = SECRET) -> str:
+    signing_input = _signing_input({"alg": "HS256", "kid": kid}, claims)
+    sig = hmac.new(secret, signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64(sig)}"
+
+
+def _hs256_jwks(kid: str = "hs", secret: bytes = SECRET) -> dict:
+    return {"keys": [{"kty": "oct", "kid": kid, "alg": "HS256", "k": _b64(secret)}]}
+
+
+def _store(jwks: dict | None = None, **kwargs) -> KeyStore:
+    return KeyStore(jwks or _hs256_jwks(), clock=lambda: NOW, **kwargs)
+
+
+def test_hs256_token_is_verified_and_parsed():
+    ctx = AuthContext.from_token(_hs256_token(), key_store=_store())
+    assert ctx.sub == UUID(CLAIMS["sub"])
+
+
+def test_tampered_signature_is_rejected():
+    header, payload, _sig = _hs256_token().split(".")
+    forged = f"{header}.{payload}.{_b64(b'x' * 32)}"
+    with pytest.raises(HTTPException) as exc:
+        AuthContext.from_token(forged, key_store=_store())
+    assert exc.value.status_code == 401
+
+
+@pytest.mark.parametrize(
+    "claims,kwargs",
+    [
+        ({**CLAIMS, "exp": NOW - 1}, {}),
+        ({**CLAIMS, "nbf": NOW + 10}, {"leeway": 5}),
+        ({k: v for k, v in CLAIMS.items() if k != "exp"}, {}),
+        ({**CLAIMS, "iss": "other"}, {"issuer": "tenauth"}),
+        ({**CLAIMS, "aud": ["other"]}, {"audience": "svc"}),
+    ],
+)
+def test_invalid_claims_are_rejected(claims: dict, kwargs: dict):
+    with pytest.raises(TokenVerificationError):
+        _store(**kwargs).verify(_hs256_token(claims))
+
+
+def test_unsigned_tokens_are_rejected():
+    token = _signing_input({"alg": "none"}, CLAIMS) + "."
+    with pytest.raises(TokenVerificationError):
+        _store().verify(token)
+
+
+def test_verified_tokens_are_cached(monkeypatch: pytest.MonkeyPatch):
+    store = _store()
+    token = _hs256_token()
+    store.verify(token)
+
+    def fail(*_args):
+        raise AssertionError("signature verified twice")
+
+    monkeypatch.setattr(hmac, "new", fail)
+    store.verify(token)
+
+
+def test_tokens_without_exp_are_reverified_after_cache_ttl():
+    now = [NOW]
+    store = KeyStore(
+        _hs256_jwks(), clock=lambda: now[0], require_exp=False, cache_ttl=10
+    )
+    token = _hs256_token({k: v for k, v in CLAIMS.items() if k != "exp"})
+    store.verify(token)
+
+    now[0] += 11
+    store.verify(token)
+    assert store._verified[token] == now[0] + 10
+
+
+def test_expired_cached_token_is_rejected():
+    now = [NOW]
+    store = KeyStore(_hs256_jwks(), clock=lambda: now[0])
+    token = _hs256_token()
+    store.verify(token)
+
+    now[0] += 61
+    with pytest.raises(TokenVerificationError, match="Token expired"):
+        store.verify(token)
+    assert token not in store._verified
+
+
+def test_not_before_allows_leeway():
+    _store(leeway=5).verify(_hs256_token({**CLAIMS, "nbf": NOW + 5}))
+
+
+def test_verified_token_cache_evicts_least_recently_used():
+    store = _store(cache_size=2)
+    hot, cold, new = (
+        _hs256_token({**CLAIMS, "jti": jti}) for jti in ("hot", "cold", "new")
+    )
+    store.verify(hot)
+    store.verify(cold)
+    store.verify(hot)
+
+    store.verify(new)
+
+    assert list(store._verified) == [hot, new]
+
+
+def test_load_rotates_keys():
+    store = _store()
+    token = _hs256_token()
+    store.verify(token)
+
+    store.load(_hs256_jwks(kid="hs2", secret=b"rotated"))
+
+    with pytest.raises(TokenVerificationError):
+        store.verify(token)
+    store.verify(_hs256_token(kid="hs2", secret=b"rotated"))
+
+
+def test_from_file_reloads_on_unknown_kid(tmp_path):
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps(_hs256_jwks()))
+    store = KeyStore.from_file(path, clock=lambda: NOW)
+
+    keys = _hs256_jwks()["keys"] + _hs256_jwks(kid="new", secret=b"new")["keys"]
+    path.write_text(json.dumps({"keys": keys}))
+    store._mtime = None
+
+    store.verify(_hs256_token(kid="new", secret=b"new"))
+    assert set(store.kids) == {"hs", "new"}
+
+
+def test_rs256_and_es256_tokens_are_verified():
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import (
+        decode_dss_signature,
+    )
+
+    rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    ec_key = ec.generate_private_key(ec.SECP256R1())
+    rsa_pub = rsa_key.public_key().public_numbers()
+    ec_pub = ec_key.public_key().public_numbers()
+    store = _store(
+        {
+            "keys": [
+                {
+                    "kty": "RSA",
+                    "kid": "rsa",
+                    "n": _int_b64(rsa_pub.n, 256),
+                    "e": _int_b64(rsa_pub.e, 3),
+                },
+                {
+                    "kty": "EC",
+                    "kid": "ec",
+                    "crv": "P-256",
+                    "x": _int_b64(ec_pub.x, 32),
+                    "y": _int_b64(ec_pub.y, 32),
+                },
+            ]
+        }
+    )
+
+    rsa_input = _signing_input({"alg": "RS256", "kid": "rsa"}, CLAIMS)
+    rsa_sig = rsa_key.sign(rsa_input.encode(), padding.PKCS1v15(), hashes.SHA256())
+    store.verify(f"{rsa_input}.{_b64(rsa_sig)}")
+
+    ec_input = _signing_input({"alg": "ES256", "kid": "ec"}, CLAIMS)
+    r, s = decode_dss_signature(
+        ec_key.sign(ec_input.encode(), ec.ECDSA(hashes.SHA256()))
+    )
+    ec_sig = r.to_bytes(32, "big") + s.to_bytes(32, "big")
+    store.verify(f"{ec_input}.{_b64(ec_sig)}")
+
+    with pytest.raises(TokenVerificationError):
+        store.verify(f"{ec_input}.{_b64(rsa_sig)}")
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from tenauth.context import current_access_context
+from tenauth.middleware import (
+    AuthContextMiddleware,
+    get_scope_access_context,
+    get_scope_auth_context,
+)
+from tenauth.schemas import AccessContext, AuthContext
+from tenauth.utils import create_bearer_token
+
+TENANT = "00000000-0000-0000-0000-000000000001"
+USER = "00000000-0000-0000-0000-000000000002"
+
+
+def _build_app(**middleware_kwargs) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(AuthContextMiddleware, **middleware_kwargs)
+
+    @app.get("/me")
+    async def me(auth: AuthContext = Depends(get_scope_auth_context)):
+        return {"sub": str(auth.sub)}
+
+    @app.get("/access")
+    async def access(ctx: AccessContext = Depends(get_scope_access_context)):
+        return {"tenant": str(ctx.tenant_id), "user": str(ctx.user_id)}
+
+    @app.get("/current")
+    async def current():
+        ctx = current_access_context.get()
+        return {"tenant": str(ctx.tenant_id) if ctx is not None else None}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+
+def _headers() -> dict[str, str]:
+    return {"Authorization": create_bearer_token(AuthContext(sub=USER, tid=TENANT))}
+
+
+def test_middleware_resolves_context_once(monkeypatch):
+    calls = []
+    original = AuthContext.from_token.__func__
+
+    def counting(cls, token, **kwargs):
+        calls.append(token)
+        return original(cls, token, **kwargs)
+
+    monkeypatch.setattr(AuthContext, "from_token", classmethod(counting))
+    client = TestClient(_build_app())
+
+    assert client.get("/access", headers=_headers()).json() == {
+        "tenant": TENANT,
+        "user": USER,
+    }
+    assert client.get("/me", headers=_headers()).json() == {"sub": USER}
+    assert len(calls) == 2
+
+
+def test_scope_dependency_rejects_missing_token():
+    client = TestClient(_build_app())
+
+    response = client.get("/me")
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Missing Authorization header"}
+    assert client.get("/health").status_code == 200
+
+
+def test_required_middleware_rejects_before_routing():
+    client = TestClient(_build_app(required=True, exempt_paths=["/health"]))
+
+    response = client.get("/health", headers={"Authorization": "Basic abc"})
+    assert response.status_code == 200
+    response = client.get("/me", headers={"Authorization": "Basic abc"})
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    assert response.json() == {"detail": "Invalid authorization scheme"}
+
+
+def test_scope_dependency_requires_middleware():
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(auth: AuthContext = Depends(get_scope_auth_context)):
+        return {}
+
+    with pytest.raises(RuntimeError, match="not installed"):
+        TestClient(app).get("/me", headers=_headers())
+
+
+def test_middleware_binds_current_access_context():
+    client = TestClient(_build_app())
+
+    assert client.get("/current", headers=_headers()).json() == {"tenant": TENANT}
+    assert client.get("/current").json() == {"tenant": None}
+    assert current_access_context.get() is None
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from tenauth.batch import validate_tokens
+from tenauth.cache import TokenCache
+from tenauth.revocation import (
+    FileRevocationSource,
+    RevocationChange,
+    RevocationIndex,
+    TableRevocationSource,
+)
+from tenauth.schemas import AuthContext
+from tenauth.utils import create_bearer_token
+
+NOW = 1_700_000_000
+SUB = UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+TID = UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb")
+
+
+def _token(**claims) -> str:
+    data = {"sub": SUB, "tid": TID, "iat": NOW, "jti": "token-1"}
+    data.update(claims)
+    return create_bearer_token(AuthContext(**data)).split(" ", 1)[1]
+
+
+def test_revoked_jti_is_rejected_even_from_cache():
+    index = RevocationIndex(clock=lambda: NOW)
+    cache = TokenCache(clock=lambda: NOW)
+    token = _token(exp=NOW + 600)
+
+    AuthContext.from_token(token, cache=cache, revocation_index=index)
+    index.revoke(jti="token-1")
+
+    with pytest.raises(HTTPException) as exc:
+        AuthContext.from_token(token, cache=cache, revocation_index=index)
+    assert exc.value.status_code == 401
+    assert cache.hits == 1
+
+
+def test_subject_revocation_only_rejects_tokens_issued_before_it():
+    index = RevocationIndex(clock=lambda: NOW)
+    index.revoke(sub=SUB, revoked_at=NOW + 10)
+
+    assert index.is_revoked(AuthContext.from_token(_token(iat=NOW)))
+    assert not index.is_revoked(AuthContext.from_token(_token(iat=NOW + 11)))
+
+    index.apply([RevocationChange("sub", str(SUB), restored=True)])
+    assert not index.is_revoked(AuthContext.from_token(_token(iat=NOW)))
+
+
+def test_batch_validation_uses_class_level_index(monkeypatch):
+    index = RevocationIndex(clock=lambda: NOW)
+    index.revoke(tid=TID)
+    monkeypatch.setattr(AuthContext, "revocation_index", index)
+
+    [result] = validate_tokens([_token()])
+
+    assert not result.ok
+    assert "revoked" in result.error
+
+
+@pytest.mark.asyncio
+async def test_file_source_delta_sync_and_rebuild(tmp_path):
+    path = tmp_path / "revocations.jsonl"
+    now = [NOW]
+    index = RevocationIndex(FileRevocationSource(path), clock=lambda: now[0])
+
+    def append(*records: dict) -> None:
+        with path.open("a") as fh:
+            for record in records:
+                fh.write(json.dumps(record) + "\n")
+
+    append({"kind": "jti", "value": "a", "expires_at": NOW + 60})
+    assert await index.sync() == 1
+    append(
+        {"kind": "jti", "value": "b"}, {"kind": "jti", "value": "a", "restored": True}
+    )
+    with path.open("a") as fh:
+        fh.write('{"kind": "jti", "val')
+    assert await index.sync() == 2
+    assert index.stats().jtis == 1
+
+    now[0] += 5
+    stats = index.stats()
+    assert (stats.syncs, stats.sync_lag) == (2, 5)
+
+    path.unlink()
+    append({"kind": "sub", "value": str(SUB)})
+    await index.sync()
+    assert (index.stats().jtis, index.stats().subjects) == (0, 1)
+
+
+def test_expired_and_withdrawn_jtis_are_dropped():
+    now = [NOW]
+    index = RevocationIndex(clock=lambda: now[0])
+
+    for i in range(8):
+        index.revoke(jti=f"jti-{i}", expires_at=NOW + 60 if i % 4 else None)
+    index.apply([RevocationChange("jti", "jti-0", restored=True)])
+    now[0] += 60
+
+    assert index.prune() == 6
+    assert index.stats().jtis == 1
+    assert index.is_revoked(AuthContext(sub=SUB, tid=TID, jti="jti-4"))
+    assert not index.is_revoked(AuthContext(sub=SUB, tid=TID, jti="jti-0"))
+    assert not index.is_revoked(AuthContext(sub=SUB, tid=TID, jti="jti-1"))
+
+
+def test_records_without_revoked_at_reject_every_token():
+    index = RevocationIndex(clock=lambda: NOW)
+    index.apply([RevocationChange.from_record({"kind": "tid", "value": str(TID)})])
+
+    assert index.is_revoked(AuthContext.from_token(_token(iat=NOW + 3600)))
+
+
+def test_subject_and_tenant_values_are_canonical_uuids():
+    index = RevocationIndex(clock=lambda: NOW)
+    index.apply(
+        [RevocationChange.from_record({"kind": "sub", "value": str(SUB).upper()})]
+    )
+    index.revoke(tid=str(TID).upper())
+
+    assert index.stats().subjects == 1
+    assert index.is_revoked(AuthContext.from_token(_token()))
+    assert index.is_revoked(AuthContext.from_token(_token(sub=UUID(int=1))))
+
+
+@pytest.mark.asyncio
+async def test_table_source_reads_rows_after_cursor(tmp_path):
+    pytest.importorskip("aiosqlite")
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'revocations.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE token_revocations (id INTEGER PRIMARY KEY, kind TEXT, "
+                "value TEXT, revoked_at REAL, expires_at REAL, "
+                "restored BOOLEAN DEFAULT 0)"
+            )
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO token_revocations (kind, value, revoked_at) "
+                "VALUES ('jti', 'a', 0)"
+            )
+        )
+    index = RevocationIndex(
+        TableRevocationSource(engine, batch_size=10), clock=lambda: NOW
+    )
+
+    assert await index.sync() == 1
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO token_revocations (kind, value, revoked_at) "
+                "VALUES ('tid', :tid, 0)"
+            ),
+            {"tid": str(TID)},
+        )
+    assert await index.sync() == 1
+    assert await index.sync() == 0
+    assert (index.stats().jtis, index.stats().tenants) == (1, 1)
+    await engine.dispose()
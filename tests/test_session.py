@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+import pytest
+from sqlalchemy import event, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from tenauth import instrumentation
+from tenauth.context import bind_access_context, get_current_access_context
+from tenauth.schemas import AccessContext, CompactAccessContext
+from tenauth.session import (
+    access_scoped_session_ctx,
+    apply_access_context,
+    gather_scoped,
+    reset_access_context,
+    track_connection_access_context,
+)
+from tenauth.testing import FakeSession
+
+TENANT = UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb")
+USER = UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+ACCESS = AccessContext(tenant_id=TENANT, user_id=USER)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("single_statement,expected", [(False, 4), (True, 1)])
+async def test_apply_access_context_round_trips(single_statement: bool, expected: int):
+    session = FakeSession()
+
+    await apply_access_context(
+        session, access_context=ACCESS, single_statement=single_statement
+    )
+
+    assert len(session.statements) == expected
+    assert session.gucs == {"app.tenant_id": str(TENANT), "app.user_id": str(USER)}
+    assert AccessContext.from_session(session) == ACCESS
+
+
+def test_compact_access_context_interns_tenants_and_round_trips():
+    first = CompactAccessContext(tenant_id=str(TENANT), user_id=str(USER))
+    second = ACCESS.compact()
+
+    assert first == second
+    assert hash(first) == hash(second)
+    assert (
+        first.tenant_id
+        is CompactAccessContext(tenant_id=TENANT, user_id=TENANT).tenant_id
+    )
+    assert {first: 1}[second] == 1
+    assert first.to_model() == ACCESS
+    assert CompactAccessContext.from_context(first) is first
+
+
+@pytest.mark.asyncio
+async def test_session_binding_accepts_compact_access_context():
+    session = FakeSession()
+
+    await apply_access_context(session, access_context=ACCESS.compact())
+
+    assert CompactAccessContext.from_session(session) == ACCESS.compact()
+    assert AccessContext.from_session(session) == ACCESS
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("single_statement", [False, True])
+async def test_apply_access_context_detects_mismatch(single_statement: bool):
+    other = "cccccccc-cccc-cccc-cccc-cccccccccccc"
+    session = FakeSession(tamper={"app.tenant_id": other})
+
+    with pytest.raises(RuntimeError, match="Tenant mismatch"):
+        await apply_access_context(
+            session, access_context=ACCESS, single_statement=single_statement
+        )
+
+
+@pytest.mark.asyncio
+async def test_access_scoped_session_ctx_resets_on_exit():
+    session = FakeSession()
+
+    @asynccontextmanager
+    async def factory():
+        yield session
+
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=ACCESS, single_statement=True
+    ) as scoped:
+        assert scoped.gucs["app.tenant_id"] == str(TENANT)
+
+    assert session.gucs == {}
+    assert session.info == {}
+
+
+@pytest.mark.asyncio
+async def test_bind_access_context_is_restored_and_inherited_by_tasks():
+    with pytest.raises(RuntimeError, match="No access context"):
+        get_current_access_context()
+
+    other = AccessContext(tenant_id=USER, user_id=TENANT)
+    with bind_access_context(ACCESS):
+        task = asyncio.create_task(asyncio.sleep(0, get_current_access_context()))
+        with bind_access_context(other):
+            assert get_current_access_context() is other
+        assert get_current_access_context() is ACCESS
+        assert await task is ACCESS
+
+    with pytest.raises(RuntimeError):
+        get_current_access_context()
+
+
+@pytest.mark.asyncio
+async def test_gather_scoped_gives_each_call_its_own_session():
+    sessions: list[FakeSession] = []
+    running = peak = 0
+
+    @asynccontextmanager
+    async def factory():
+        session = FakeSession()
+        sessions.append(session)
+        yield session
+
+    def query(n: int):
+        async def call(session: FakeSession) -> tuple[int, str]:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            assert get_current_access_context() is ACCESS
+            return n, session.gucs["app.tenant_id"]
+
+        return call
+
+    with bind_access_context(ACCESS):
+        results = await gather_scoped(
+            factory, *(query(n) for n in range(5)), limit=2, single_statement=True
+        )
+
+    assert results == [(n, str(TENANT)) for n in range(5)]
+    assert peak == 2
+    assert len({id(session) for session in sessions}) == 5
+    assert all(session.gucs == {} for session in sessions)
+
+
+@pytest.mark.asyncio
+async def test_gather_scoped_cancels_siblings_on_failure():
+    cancelled = []
+
+    @asynccontextmanager
+    async def factory():
+        yield FakeSession()
+
+    async def fail(session):
+        raise ValueError("boom")
+
+    async def slow(session):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(ValueError, match="boom"):
+        await gather_scoped(factory, slow, fail, access_context=ACCESS)
+    assert cancelled == [True]
+
+    with pytest.raises(RuntimeError, match="No access context"):
+        await gather_scoped(factory, slow)
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_reuse_connection_skips_matching_context(sqlite_engine):
+    engine, calls = sqlite_engine
+    track_connection_access_context(engine)
+    other = AccessContext(tenant_id=USER, user_id=TENANT)
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    async def run(ctx: AccessContext, *, commit: bool) -> None:
+        async with access_scoped_session_ctx(
+            session_factory=factory, access_context=ctx, reuse_connection=True
+        ) as session:
+            assert AccessContext.from_session(session) == ctx
+            if commit:
+                await session.commit()
+
+    await run(ACCESS, commit=False)  # rolled back: binding is not kept
+    await run(ACCESS, commit=True)
+    assert calls["set_config"] == 4
+
+    await run(ACCESS, commit=True)
+    await run(ACCESS, commit=False)
+    assert calls["set_config"] == 4
+
+    await run(other, commit=True)
+    await run(ACCESS, commit=False)
+    assert calls["set_config"] == 8
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_session_scoped_bindings_are_reset_on_checkin(
+    sqlite_engine, monkeypatch: pytest.MonkeyPatch
+):
+    engine, calls = sqlite_engine
+    track_connection_access_context(engine)
+    events = []
+    monkeypatch.setattr(instrumentation, "hooks", [events.append])
+    other = AccessContext(tenant_id=USER, user_id=TENANT)
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=ACCESS, reuse_connection=True
+    ) as session:
+        await session.commit()
+    assert calls["set_config"] == 2
+
+    # an eager session overwrites the GUCs and commits them on the same connection
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=other, single_statement=True
+    ) as session:
+        await session.commit()
+    # bind, then a reset on checkin for the committed connection; the exit's
+    # RESET is not valid SQLite, so its connection is reset on checkin as well
+    assert calls["set_config"] == 8
+    resets = [e for e in events if e.attributes.get("mode") == "checkin"]
+    assert len(resets) == 2 and all(e.round_trips >= 2 for e in resets)
+
+    async with factory() as session:
+        tenant = await session.execute(
+            text("SELECT current_setting('app.tenant_id', true)")
+        )
+        assert tenant.scalar() is None
+
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=ACCESS, reuse_connection=True
+    ) as session:
+        assert AccessContext.from_session(session) == ACCESS
+    assert calls["set_config"] == 10  # the recorded binding was dropped
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_untracked_engines_are_not_reset_on_checkin(sqlite_engine):
+    engine, calls = sqlite_engine
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda _conn, _cursor, sql, *_args: statements.append(sql),
+    )
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    for _ in range(2):
+        async with access_scoped_session_ctx(
+            session_factory=factory, access_context=ACCESS, single_statement=True
+        ):
+            pass
+
+    # per session: the binding and the exit's RESET (SQLite rejects it, so the
+    # second one is never sent); nothing runs on checkin
+    assert calls["set_config"] == 2 * 2
+    assert [sql.split(" ")[0] for sql in statements] == ["SELECT", "RESET"] * 2
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_reuse_connection_requires_tracking(sqlite_engine):
+    engine, _calls = sqlite_engine
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    with pytest.raises(RuntimeError, match="track_connection_access_context"):
+        async with access_scoped_session_ctx(
+            session_factory=factory, access_context=ACCESS, reuse_connection=True
+        ):
+            pass
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+async def test_transaction_local_binds_each_transaction_without_reset(sqlite_engine):
+    engine, calls = sqlite_engine
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda _conn, _cursor, sql, *_args: statements.append(sql),
+    )
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=ACCESS, transaction_local=True
+    ) as session:
+        await session.commit()
+        await session.execute(text("SELECT 1"))
+
+    assert calls["set_config"] == 4
+    assert len(statements) == 3
+    assert not any("RESET" in sql for sql in statements)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reuse_connection_and_transaction_local_are_exclusive():
+    with pytest.raises(ValueError):
+        async with access_scoped_session_ctx(
+            session_factory=None,
+            access_context=ACCESS,
+            reuse_connection=True,
+            transaction_local=True,
+        ):
+            pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("execute", [False, True])
+async def test_lazy_binding_only_touches_database_when_used(
+    sqlite_engine, execute: bool
+):
+    engine, calls = sqlite_engine
+    statements: list[str] = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda _conn, _cursor, sql, *_args: statements.append(sql),
+    )
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=ACCESS, lazy=True
+    ) as session:
+        assert statements == []
+        assert AccessContext.from_session(session) == ACCESS
+        if execute:
+            await session.execute(text("SELECT 1"))
+
+    if execute:
+        assert calls["set_config"] == 2
+        assert statements[1] == "SELECT 1"
+        assert statements[2].startswith("RESET")
+    else:
+        assert statements == []
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+@pytest.mark.parametrize("tracked,expected", [(False, 4), (True, 8)])
+async def test_lazy_binding_rebinds_after_commit(
+    sqlite_engine, tracked: bool, expected: int
+):
+    engine, calls = sqlite_engine
+    if tracked:
+        track_connection_access_context(engine)
+
+    @asynccontextmanager
+    async def factory():
+        async with AsyncSession(engine) as session:
+            yield session
+
+    current = text("SELECT current_setting('app.tenant_id', true)")
+    async with access_scoped_session_ctx(
+        session_factory=factory, access_context=ACCESS, lazy=True
+    ) as session:
+        await session.execute(text("SELECT 1"))
+        await session.commit()  # the connection goes back to the pool
+        assert (await session.execute(current)).scalar() == str(TENANT)
+    # two bindings; tracked engines also reset each committed connection on checkin
+    assert calls["set_config"] == expected
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_session_binding_reports_round_trips(monkeypatch: pytest.MonkeyPatch):
+    events = []
+    monkeypatch.setattr(instrumentation, "hooks", [events.append])
+    session = FakeSession()
+
+    await apply_access_context(session, access_context=ACCESS)
+    await reset_access_context(session)
+
+    assert [(e.name, e.round_trips) for e in events] == [
+        (instrumentation.SESSION_APPLY, 2),
+        (instrumentation.SESSION_VERIFY, 2),
+        (instrumentation.SESSION_RESET, 2),
+    ]
+    assert sum(e.round_trips for e in events) == len(session.statements)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from uuid import UUID, uuid4
+
+import pytest
+
+from tenauth.tenancy import TenantEngineRegistry, dsn_with_tenant
+
+
+class FakePool:
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self.checked_out = 0
+
+    def size(self) -> int:
+        return self._size
+
+    def checkedin(self) -> int:
+        return 0
+
+    def checkedout(self) -> int:
+        return self.checked_out
+
+    def overflow(self) -> int:
+        return 0
+
+
+class FakeEngine:
+    def __init__(self, dsn: str, *, pool_size: int, max_overflow: int) -> None:
+        self.dsn = dsn
+        self.pool = FakePool(pool_size)
+        self.disposed = False
+
+    async def dispose(self) -> None:
+        self.disposed = True
+
+
+def test_dsn_with_tenant_extends_existing_options():
+    tenant = UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb")
+    dsn = dsn_with_tenant("postgresql://db/app?options=-c%20search_path%3Dapp", tenant)
+    assert dsn == (
+        "postgresql://db/app?options=-c%20search_path%3Dapp%20-c%20"
+        f"app.tenant_id%3D{tenant}"
+    )
+
+
+@pytest.mark.asyncio
+async def test_registry_creates_one_engine_per_tenant():
+    registry = TenantEngineRegistry(
+        "postgresql+asyncpg://db/app", engine_factory=FakeEngine
+    )
+    tenant = uuid4()
+
+    engine = await registry.get_engine(tenant)
+
+    assert await registry.get_engine(tenant) is engine
+    assert engine.dsn == dsn_with_tenant("postgresql+asyncpg://db/app", tenant)
+    assert registry.stats().created == 1
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_least_recently_used_idle_engine():
+    registry = TenantEngineRegistry(
+        "postgresql+asyncpg://db/app",
+        pool_size=2,
+        max_connections=4,
+        engine_factory=FakeEngine,
+    )
+    first, second, third = uuid4(), uuid4(), uuid4()
+    first_engine = await registry.get_engine(first)
+    second_engine = await registry.get_engine(second)
+    await registry.get_engine(first)
+
+    await registry.get_engine(third)
+
+    assert second_engine.disposed
+    assert not first_engine.disposed
+    assert second not in registry
+    stats = registry.stats()
+    assert (stats.engines, stats.reserved_connections, stats.evictions) == (2, 4, 1)
+
+
+@pytest.mark.asyncio
+async def test_registry_never_evicts_busy_engines():
+    registry = TenantEngineRegistry(
+        "postgresql+asyncpg://db/app",
+        pool_size=2,
+        max_connections=2,
+        engine_factory=FakeEngine,
+    )
+    busy = await registry.get_engine(uuid4())
+    busy.pool.checked_out = 1
+
+    with pytest.raises(RuntimeError, match="budget exhausted"):
+        await registry.get_engine(uuid4())
+    assert not busy.disposed
+
+
+@pytest.mark.asyncio
+async def test_registry_keeps_leased_engines_until_released():
+    registry = TenantEngineRegistry(
+        "postgresql+asyncpg://db/app",
+        pool_size=2,
+        max_connections=2,
+        engine_factory=FakeEngine,
+    )
+    tenant = uuid4()
+
+    async with registry.lease(tenant) as engine:
+        # no connection is checked out, but the lease keeps it from eviction
+        with pytest.raises(RuntimeError, match="budget exhausted"):
+            await registry.get_engine(uuid4())
+        assert registry.stats().pools[0].leases == 1
+
+        await registry.dispose(tenant)
+        assert tenant not in registry
+        assert not engine.disposed
+        assert registry.reserved_connections == 2
+
+    assert engine.disposed
+    assert registry.reserved_connections == 0
+    await registry.get_engine(uuid4())
+
+
+@pytest.mark.asyncio
+async def test_registry_evict_idle_and_dispose_all():
+    now = [0.0]
+    registry = TenantEngineRegistry(
+        "postgresql+asyncpg://db/app", engine_factory=FakeEngine, clock=lambda: now[0]
+    )
+    stale = await registry.get_engine(uuid4())
+    now[0] = 100.0
+    fresh = await registry.get_engine(uuid4())
+
+    assert await registry.evict_idle(60) == 1
+    assert stale.disposed and not fresh.disposed
+
+    await registry.dispose_all()
+    assert fresh.disposed and len(registry) == 0
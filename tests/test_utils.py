@@ -4,8 +4,11 @@ import base64
 import json
 from uuid import UUID
 
+import pytest
+
+from tenauth.jwks import KeyStore
 from tenauth.schemas import AuthContext
-from tenauth.utils import create_bearer_token
+from tenauth.utils import TokenMinter, create_bearer_token
 
 
 def _decode_segment(segment: str) -> dict:
@@ -62,3 +65,89 @@ def test_create_bearer_token_omits_empty_fields():
     assert "role" not in payload
     assert "scopes" not in payload
     assert "plan" not in payload
+
+
+SECRET = b"tenauth-minter-secret"
+NOW = 1_700_000_000
+
+
+def _context(**overrides) -> AuthContext:
+    data = {
+        "sub": UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+        "tid": UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"),
+        "scopes": ["datasets:read"],
+    }
+    data.update(overrides)
+    return AuthContext(**data)
+
+
+def test_token_minter_signs_tokens_the_key_store_accepts():
+    minter = TokenMinter(
+        SECRET, kid="svc", issuer="tenauth", ttl=600, clock=lambda: NOW
+    )
+    jwks = {
+        "keys": [
+            {
+                "kty": "oct",
+                "kid": "svc",
+                "k": base64.urlsafe_b64encode(SECRET).decode().rstrip("="),
+            }
+        ]
+    }
+    store = KeyStore(jwks, issuer="tenauth", clock=lambda: NOW)
+
+    token = minter.mint(_context())
+    ctx = AuthContext.from_token(token, key_store=store)
+
+    assert ctx.scopes == ["datasets:read"]
+    assert (ctx.iat, ctx.exp, ctx.iss) == (NOW, NOW + 600, "tenauth")
+    assert _decode_segment(token.split(".")[0]) == {
+        "alg": "HS256",
+        "typ": "JWT",
+        "kid": "svc",
+    }
+
+
+def test_token_minter_es256_signatures_verify():
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    public = private_key.public_key().public_numbers()
+    jwks = {
+        "keys": [
+            {
+                "kty": "EC",
+                "crv": "P-256",
+                "kid": "es",
+                "x": base64.urlsafe_b64encode(public.x.to_bytes(32, "big"))
+                .decode()
+                .rstrip("="),
+                "y": base64.urlsafe_b64encode(public.y.to_bytes(32, "big"))
+                .decode()
+                .rstrip("="),
+            }
+        ]
+    }
+    minter = TokenMinter(private_key, algorithm="ES256", kid="es", clock=lambda: NOW)
+
+    token = minter.mint(_context())
+
+    KeyStore(jwks, clock=lambda: NOW).verify(token)
+
+
+def test_token_minter_caches_until_refresh_margin():
+    now = [NOW]
+    minter = TokenMinter(SECRET, ttl=600, refresh_margin=60, clock=lambda: now[0])
+
+    first, same, other = minter.mint_many(
+        [_context(), _context(), _context(scopes=["datasets:write"])]
+    )
+    assert first == same != other
+    assert (minter.minted, minter.hits) == (2, 1)
+
+    now[0] += 539
+    assert minter.mint(_context()) == first
+    now[0] += 1
+    assert minter.mint(_context()) != first
+    assert minter.minted == 3
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from uuid import UUID
+import asyncio
+import time
+from uuid import UUID, uuid4
 
 import pytest
 from fastapi import FastAPI
@@ -8,17 +10,23 @@ from fastapi.testclient import TestClient
 from starlette import status
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
-from tenauth.schemas import AuthContext
+from tenauth.schemas import AccessContext, AuthContext, CompactAccessContext
 from tenauth.utils import create_bearer_token
-from tenauth.websocket import websocket_access_context
+from tenauth.websocket import (
+    WebSocketRegistry,
+    WebSocketSessionManager,
+    websocket_access_context,
+    websocket_compact_access_context,
+)
 
 
-def _make_app():
+def _make_app(resolve=websocket_access_context, expected=AccessContext):
     app = FastAPI()
 
     @app.websocket("/ws")
     async def endpoint(websocket: WebSocket):
-        ctx = await websocket_access_context(websocket)
+        ctx = await resolve(websocket)
+        assert type(ctx) is expected
         await websocket.accept()
         await websocket.send_json(
             {"tenant_id": str(ctx.tenant_id), "user_id": str(ctx.user_id)}
@@ -52,6 +60,19 @@ def test_websocket_access_context_authorization_header():
     }
 
 
+def test_websocket_compact_access_context():
+    app = _make_app(websocket_compact_access_context, CompactAccessContext)
+    ctx = _sample_context()
+
+    with TestClient(app) as client:
+        with client.websocket_connect(
+            "/ws", headers={"Authorization": create_bearer_token(ctx)}
+        ) as ws:
+            payload = ws.receive_json()
+
+    assert payload == {"tenant_id": str(ctx.tid), "user_id": str(ctx.sub)}
+
+
 def test_websocket_access_context_query_parameter():
     app = _make_app()
     ctx = _sample_context()
@@ -115,3 +136,144 @@ def test_websocket_access_context_invalid_token():
                 pass
 
     assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+class _FakeWebSocket:
+    def __init__(self) -> None:
+        self.closed: tuple[int, str] | None = None
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        self.closed = (code, reason)
+
+
+def _clock(start: float):
+    origin = time.monotonic()
+    return lambda: start + time.monotonic() - origin
+
+
+def _context_expiring_at(exp: int, **updates) -> AuthContext:
+    return _sample_context().model_copy(update={"exp": exp, **updates})
+
+
+@pytest.mark.asyncio
+async def test_session_manager_closes_expired_sockets():
+    manager = WebSocketSessionManager(clock=_clock(1_700_000_000.95))
+    expiring, lasting = _FakeWebSocket(), _FakeWebSocket()
+    manager.register(expiring, _context_expiring_at(1_700_000_001))
+    manager.register(lasting, _context_expiring_at(1_700_003_600))
+    assert manager.stats(expiring_within=1).expiring == 1
+
+    await asyncio.sleep(0.2)
+
+    assert expiring.closed == (status.WS_1008_POLICY_VIOLATION, "Token expired")
+    assert lasting.closed is None
+    stats = manager.stats()
+    assert (stats.active, stats.expired) == (1, 1)
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_manager_refresh_extends_connection():
+    manager = WebSocketSessionManager(clock=_clock(1_700_000_000.95))
+    websocket = _FakeWebSocket()
+    manager.register(websocket, _context_expiring_at(1_700_000_001))
+
+    fresh = create_bearer_token(_context_expiring_at(1_700_003_600))
+    assert manager.handle_message(websocket, {"type": "refresh_token", "token": fresh})
+    assert not manager.handle_message(websocket, {"type": "chat"})
+    await asyncio.sleep(0.2)
+
+    assert websocket.closed is None
+    assert manager.auth_context(websocket).exp == 1_700_003_600
+    assert manager.stats().refreshed == 1
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_manager_rejects_refresh_for_other_user():
+    manager = WebSocketSessionManager()
+    websocket = _FakeWebSocket()
+    manager.register(websocket, _context_expiring_at(4_102_444_800))
+    other = _context_expiring_at(
+        4_102_444_800, sub=UUID("cccccccc-cccc-cccc-cccc-cccccccccccc")
+    )
+
+    with pytest.raises(WebSocketDisconnect) as exc:
+        manager.refresh(websocket, create_bearer_token(other))
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+
+    manager.unregister(websocket)
+    assert websocket not in manager
+    await manager.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", [123, None, ["token"], ""])
+async def test_session_manager_rejects_malformed_refresh(token):
+    manager = WebSocketSessionManager()
+    websocket = _FakeWebSocket()
+    manager.register(websocket, _context_expiring_at(4_102_444_800))
+
+    with pytest.raises(WebSocketDisconnect) as exc:
+        manager.handle_message(websocket, {"type": "refresh_token", "token": token})
+    assert exc.value.code == status.WS_1008_POLICY_VIOLATION
+    await manager.close()
+
+
+class _RecordingWebSocket(_FakeWebSocket):
+    def __init__(self, *, stalled: bool = False) -> None:
+        super().__init__()
+        self.sent: list = []
+        self._stalled = stalled
+
+    async def send_json(self, message) -> None:
+        if self._stalled:
+            import asyncio
+
+            await asyncio.Event().wait()
+        self.sent.append(message)
+
+
+@pytest.mark.asyncio
+async def test_registry_fans_out_by_tenant_and_user():
+    tenant, other_tenant = uuid4(), uuid4()
+    user = uuid4()
+    registry = WebSocketRegistry()
+    first, second, outsider = (_RecordingWebSocket() for _ in range(3))
+    registry.add(first, AccessContext(tenant_id=tenant, user_id=user))
+    registry.add(second, AccessContext(tenant_id=tenant, user_id=uuid4()))
+    registry.add(outsider, AccessContext(tenant_id=other_tenant, user_id=uuid4()))
+
+    assert registry.send_to_tenant(tenant, {"event": "tenant"}) == 2
+    assert registry.send_to_user(user, {"event": "user"}) == 1
+    await asyncio.sleep(0)
+
+    assert first.sent == [{"event": "tenant"}, {"event": "user"}]
+    assert second.sent == [{"event": "tenant"}]
+    assert outsider.sent == []
+
+    registry.remove(first)
+    registry.remove(second)
+    assert registry.tenant_sockets(tenant) == []
+    assert registry.stats().tenants == 1
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_registry_drops_slow_consumers():
+    tenant = uuid4()
+    registry = WebSocketRegistry(max_queue=2)
+    slow, fast = _RecordingWebSocket(stalled=True), _RecordingWebSocket()
+    registry.add(slow, AccessContext(tenant_id=tenant, user_id=uuid4()))
+    registry.add(fast, AccessContext(tenant_id=tenant, user_id=uuid4()))
+
+    for i in range(4):
+        registry.send_to_tenant(tenant, {"n": i})
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert slow not in registry
+    assert slow.closed == (status.WS_1008_POLICY_VIOLATION, "Slow consumer")
+    assert [m["n"] for m in fast.sent] == [0, 1, 2, 3]
+    assert registry.stats().dropped == 1
+    await registry.close()